@@ -0,0 +1,24 @@
+"""add user membership version
+
+Revision ID: 6f0c2a7d9e14
+Revises: 2bbf57cd58d9
+Create Date: 2026-10-18 09:12:41.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f0c2a7d9e14'
+down_revision = '2bbf57cd58d9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('user', sa.Column('membership_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    op.drop_column('user', 'membership_version')
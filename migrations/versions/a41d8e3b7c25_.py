@@ -0,0 +1,24 @@
+"""add project version
+
+Revision ID: a41d8e3b7c25
+Revises: 6f0c2a7d9e14
+Create Date: 2026-10-18 11:04:17.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41d8e3b7c25'
+down_revision = '6f0c2a7d9e14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('project', sa.Column('version', sa.BigInteger(), server_default='0', nullable=False))
+
+
+def downgrade():
+    op.drop_column('project', 'version')
@@ -0,0 +1,147 @@
+"""optionally hash-partition task and task_assignment by project
+
+Revision ID: a7c3e5f1d208
+Revises: d2f6a9c3e1b4
+Create Date: 2026-10-18 23:41:12.508331
+
+Postgres 12+ only, and only when the number of partitions is passed:
+
+    flask db upgrade -x task_partitions=16
+
+Otherwise the revision does nothing. To partition a database that went past it, run
+``flask db downgrade d2f6a9c3e1b4`` first, which is a no-op on unpartitioned tables.
+
+Both tables are rebuilt as ``PARTITION BY HASH (project_id)``, with partitions
+``task_p<n>`` and ``task_assignment_p<n>``, so that the rows of a project and its
+indexes live in one partition: lists prune to it, and each partition is vacuumed on its
+own. The primary keys must include the partition key, they become ``(id, project_id)``
+and ``(user_id, task_id, project_id)``, the former replacing ``uq_task_id_project_id``;
+task IDs stay unique through their sequence. The ORM models are the same for both layouts.
+
+The rows are copied under an exclusive lock on both tables, run it in a maintenance
+window. ``flask benchmark-tasks`` compares the listings and vacuums before and after.
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e5f1d208'
+down_revision = 'd2f6a9c3e1b4'
+branch_labels = None
+depends_on = None
+
+# Counter triggers of revision e5b9d2c4f871, their functions are kept
+COUNTER_TRIGGERS = [
+    "CREATE TRIGGER count_inserted_tasks AFTER INSERT ON task "
+    "REFERENCING NEW TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION count_tasks()",
+    "CREATE TRIGGER count_deleted_tasks AFTER DELETE ON task "
+    "REFERENCING OLD TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION count_tasks()",
+    "CREATE TRIGGER count_inserted_assignments AFTER INSERT ON task_assignment "
+    "REFERENCING NEW TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION count_assigned_tasks()",
+    "CREATE TRIGGER count_deleted_assignments AFTER DELETE ON task_assignment "
+    "REFERENCING OLD TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION count_assigned_tasks()",
+]
+
+
+def _is_partitioned():
+    return op.get_bind().execute(sa.text("SELECT relkind FROM pg_class WHERE oid = 'task'::regclass")).scalar() == 'p'
+
+
+def _rebuild(partitions=None):
+    """Recreate both tables with their rows, hash-partitioned in `partitions` or not partitioned"""
+    sequence = op.get_bind().execute(sa.text("SELECT pg_get_serial_sequence('task', 'id')")).scalar()
+    partition_by = " PARTITION BY HASH (project_id)" if partitions else ""
+
+    op.execute("LOCK TABLE task, task_assignment IN ACCESS EXCLUSIVE MODE")
+    op.execute("ALTER TABLE task_assignment RENAME TO task_assignment_previous")
+    op.execute("ALTER TABLE task RENAME TO task_previous")
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY NONE")
+
+    op.execute(
+        f"""
+        CREATE TABLE task (
+            id BIGINT NOT NULL DEFAULT nextval('{sequence}'),
+            title VARCHAR(80) NOT NULL,
+            description TEXT,
+            project_id BIGINT NOT NULL,
+            search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(title, '')), 'A')
+                || setweight(to_tsvector('english', coalesce(description, '')), 'B')
+            ) STORED
+        ){partition_by}
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TABLE task_assignment (
+            user_id BIGINT NOT NULL,
+            task_id BIGINT NOT NULL,
+            project_id BIGINT NOT NULL
+        ){partition_by}
+        """
+    )
+    for table in ('task', 'task_assignment'):
+        for remainder in range(partitions or 0):
+            op.execute(
+                f"CREATE TABLE {table}_p{remainder} PARTITION OF {table} "
+                f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+            )
+
+    # Before the triggers are created, the counters already count these rows
+    op.execute(
+        "INSERT INTO task (id, title, description, project_id) "
+        "SELECT id, title, description, project_id FROM task_previous"
+    )
+    op.execute(
+        "INSERT INTO task_assignment (user_id, task_id, project_id) "
+        "SELECT user_id, task_id, project_id FROM task_assignment_previous"
+    )
+    op.execute("DROP TABLE task_assignment_previous")
+    op.execute("DROP TABLE task_previous")
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY task.id")
+
+    # Indexes are built once the rows are copied, and take back the names of the dropped ones
+    if partitions:
+        op.execute("ALTER TABLE task ADD CONSTRAINT task_pkey PRIMARY KEY (id, project_id)")
+        op.execute(
+            "ALTER TABLE task_assignment ADD CONSTRAINT task_assignment_pkey PRIMARY KEY (user_id, task_id, project_id)"
+        )
+    else:
+        op.execute("ALTER TABLE task ADD CONSTRAINT task_pkey PRIMARY KEY (id)")
+        op.execute("ALTER TABLE task ADD CONSTRAINT uq_task_id_project_id UNIQUE (id, project_id)")
+        op.execute("ALTER TABLE task_assignment ADD CONSTRAINT task_assignment_pkey PRIMARY KEY (user_id, task_id)")
+    op.execute("CREATE INDEX ix_task_project_id_id ON task (project_id, id)")
+    op.execute('CREATE INDEX ix_task_project_id_title ON task (project_id, title COLLATE "C", id)')
+    op.execute("CREATE INDEX ix_task_search_vector ON task USING gin (search_vector)")
+    op.execute("CREATE INDEX ix_task_assignment_task_id ON task_assignment (task_id)")
+
+    op.execute("ALTER TABLE task ADD CONSTRAINT task_project_id_fkey FOREIGN KEY (project_id) REFERENCES project (id)")
+    op.execute(
+        "ALTER TABLE task_assignment ADD CONSTRAINT task_assignment_user_id_fkey "
+        'FOREIGN KEY (user_id) REFERENCES "user" (id)'
+    )
+    op.execute(
+        "ALTER TABLE task_assignment ADD CONSTRAINT task_assignment_task_id_project_id_fkey "
+        "FOREIGN KEY (task_id, project_id) REFERENCES task (id, project_id)"
+    )
+
+    for statement in COUNTER_TRIGGERS:
+        op.execute(statement)
+    op.execute("ANALYZE task, task_assignment")
+
+
+def upgrade():
+    partitions = context.get_x_argument(as_dictionary=True).get('task_partitions')
+    if partitions is None or op.get_bind().dialect.name != 'postgresql':
+        return
+
+    if not partitions.isdigit() or int(partitions) < 2:
+        raise ValueError("task_partitions must be an integer of at least 2")
+    if not _is_partitioned():
+        _rebuild(int(partitions))
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql' and _is_partitioned():
+        _rebuild()
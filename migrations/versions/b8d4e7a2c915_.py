@@ -0,0 +1,36 @@
+"""add task list composite indexes
+
+Revision ID: b8d4e7a2c915
+Revises: f3a8c61e0b57
+Create Date: 2026-10-18 21:14:06.285519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8d4e7a2c915'
+down_revision = 'f3a8c61e0b57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Titles are indexed in code point order, which the prefix filter and title sort use
+    title = sa.text('title COLLATE "C"') if op.get_bind().dialect.name == 'postgresql' else 'title'
+
+    with op.get_context().autocommit_block():
+        op.create_index('ix_task_project_id_id', 'task', ['project_id', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index(
+            'ix_task_project_id_title', 'task', ['project_id', title, 'id'], unique=False, postgresql_concurrently=True
+        )
+        # Covered by the composite indexes
+        op.drop_index('ix_task_project_id', table_name='task', postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index('ix_task_project_id', 'task', ['project_id'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_task_project_id_title', table_name='task', postgresql_concurrently=True)
+        op.drop_index('ix_task_project_id_id', table_name='task', postgresql_concurrently=True)
@@ -0,0 +1,35 @@
+"""add foreign key indexes
+
+Revision ID: c7e2f9a1d384
+Revises: a41d8e3b7c25
+Create Date: 2026-10-18 13:27:05.663920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e2f9a1d384'
+down_revision = 'a41d8e3b7c25'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_task_project_id', 'task', ['project_id']),
+    ('ix_project_membership_project_id', 'project_membership', ['project_id']),
+    ('ix_task_assignment_task_id', 'task_assignment', ['task_id']),
+]
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY does not lock writes, but can't run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,129 @@
+"""carry the project of tasks into task_assignment
+
+Revision ID: d2f6a9c3e1b4
+Revises: b8d4e7a2c915
+Create Date: 2026-10-18 23:02:37.614209
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f6a9c3e1b4'
+down_revision = 'b8d4e7a2c915'
+branch_labels = None
+depends_on = None
+
+POSTGRESQL_COUNT_ASSIGNED_TASKS = """
+    CREATE OR REPLACE FUNCTION count_assigned_tasks() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO assigned_task_count AS counter (project_id, user_id, task_count)
+        SELECT project_id, user_id, count(*) * (CASE TG_OP WHEN 'INSERT' THEN 1 ELSE -1 END)
+        FROM changed GROUP BY project_id, user_id ORDER BY project_id, user_id
+        ON CONFLICT (project_id, user_id) DO UPDATE SET task_count = counter.task_count + EXCLUDED.task_count;
+        RETURN NULL;
+    END $$
+"""
+
+SQLITE_ASSIGNMENT_TRIGGERS = [
+    """
+    CREATE TRIGGER count_inserted_assignments AFTER INSERT ON task_assignment BEGIN
+        INSERT INTO assigned_task_count (project_id, user_id, task_count)
+        VALUES (NEW.project_id, NEW.user_id, 1)
+        ON CONFLICT (project_id, user_id) DO UPDATE SET task_count = task_count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER count_deleted_assignments AFTER DELETE ON task_assignment BEGIN
+        UPDATE assigned_task_count SET task_count = task_count - 1
+        WHERE user_id = OLD.user_id AND project_id = OLD.project_id;
+    END
+    """,
+]
+
+# Previous definitions, from revision e5b9d2c4f871
+POSTGRESQL_COUNT_ASSIGNED_TASKS_JOINED = """
+    CREATE OR REPLACE FUNCTION count_assigned_tasks() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO assigned_task_count AS counter (project_id, user_id, task_count)
+        SELECT task.project_id, changed.user_id, count(*) * (CASE TG_OP WHEN 'INSERT' THEN 1 ELSE -1 END)
+        FROM changed JOIN task ON task.id = changed.task_id
+        GROUP BY task.project_id, changed.user_id
+        ORDER BY task.project_id, changed.user_id
+        ON CONFLICT (project_id, user_id) DO UPDATE SET task_count = counter.task_count + EXCLUDED.task_count;
+        RETURN NULL;
+    END $$
+"""
+
+SQLITE_ASSIGNMENT_TRIGGERS_JOINED = [
+    """
+    CREATE TRIGGER count_inserted_assignments AFTER INSERT ON task_assignment BEGIN
+        INSERT INTO assigned_task_count (project_id, user_id, task_count)
+        SELECT project_id, NEW.user_id, 1 FROM task WHERE id = NEW.task_id
+        ON CONFLICT (project_id, user_id) DO UPDATE SET task_count = task_count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER count_deleted_assignments AFTER DELETE ON task_assignment BEGIN
+        UPDATE assigned_task_count SET task_count = task_count - 1
+        WHERE user_id = OLD.user_id AND project_id = (SELECT project_id FROM task WHERE id = OLD.task_id);
+    END
+    """,
+]
+
+
+def _replace_sqlite_triggers(statements):
+    op.execute("DROP TRIGGER IF EXISTS count_inserted_assignments")
+    op.execute("DROP TRIGGER IF EXISTS count_deleted_assignments")
+    for statement in statements:
+        op.execute(statement)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    # Target of the composite foreign key below, and the primary key of partitioned tasks
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index(
+                'uq_task_id_project_id', 'task', ['id', 'project_id'], unique=True, postgresql_concurrently=True
+            )
+        op.execute("ALTER TABLE task ADD CONSTRAINT uq_task_id_project_id UNIQUE USING INDEX uq_task_id_project_id")
+
+    op.add_column('task_assignment', sa.Column('project_id', sa.BigInteger(), nullable=True))
+    op.execute(
+        "UPDATE task_assignment SET project_id = (SELECT project_id FROM task WHERE task.id = task_assignment.task_id)"
+    )
+
+    if dialect == 'postgresql':
+        op.alter_column('task_assignment', 'project_id', nullable=False)
+        op.drop_constraint('task_assignment_task_id_fkey', 'task_assignment', type_='foreignkey')
+        op.create_foreign_key(
+            'task_assignment_task_id_project_id_fkey',
+            'task_assignment',
+            'task',
+            ['task_id', 'project_id'],
+            ['id', 'project_id'],
+        )
+        op.execute(POSTGRESQL_COUNT_ASSIGNED_TASKS)
+    elif dialect == 'sqlite':
+        # Rebuilding the table to add the constraints would drop its triggers, and SQLite
+        # doesn't enforce foreign keys by default: the column stays nullable there
+        _replace_sqlite_triggers(SQLITE_ASSIGNMENT_TRIGGERS)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute(POSTGRESQL_COUNT_ASSIGNED_TASKS_JOINED)
+        op.drop_constraint('task_assignment_task_id_project_id_fkey', 'task_assignment', type_='foreignkey')
+        op.create_foreign_key('task_assignment_task_id_fkey', 'task_assignment', 'task', ['task_id'], ['id'])
+    elif dialect == 'sqlite':
+        _replace_sqlite_triggers(SQLITE_ASSIGNMENT_TRIGGERS_JOINED)
+
+    op.drop_column('task_assignment', 'project_id')
+
+    if dialect == 'postgresql':
+        op.drop_constraint('uq_task_id_project_id', 'task', type_='unique')
@@ -0,0 +1,123 @@
+"""add task counters
+
+Revision ID: e5b9d2c4f871
+Revises: c7e2f9a1d384
+Create Date: 2026-10-18 16:42:51.318027
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b9d2c4f871'
+down_revision = 'c7e2f9a1d384'
+branch_labels = None
+depends_on = None
+
+POSTGRESQL_TRIGGERS = [
+    """
+    CREATE FUNCTION count_tasks() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        UPDATE project SET task_count = project.task_count + delta.task_count
+        FROM (
+            SELECT project_id, count(*) * (CASE TG_OP WHEN 'INSERT' THEN 1 ELSE -1 END) AS task_count
+            FROM changed GROUP BY project_id
+        ) AS delta
+        WHERE project.id = delta.project_id;
+        RETURN NULL;
+    END $$
+    """,
+    """
+    CREATE FUNCTION count_assigned_tasks() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO assigned_task_count AS counter (project_id, user_id, task_count)
+        SELECT task.project_id, changed.user_id, count(*) * (CASE TG_OP WHEN 'INSERT' THEN 1 ELSE -1 END)
+        FROM changed JOIN task ON task.id = changed.task_id
+        GROUP BY task.project_id, changed.user_id
+        ORDER BY task.project_id, changed.user_id
+        ON CONFLICT (project_id, user_id) DO UPDATE SET task_count = counter.task_count + EXCLUDED.task_count;
+        RETURN NULL;
+    END $$
+    """,
+    "CREATE TRIGGER count_inserted_tasks AFTER INSERT ON task "
+    "REFERENCING NEW TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION count_tasks()",
+    "CREATE TRIGGER count_deleted_tasks AFTER DELETE ON task "
+    "REFERENCING OLD TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION count_tasks()",
+    "CREATE TRIGGER count_inserted_assignments AFTER INSERT ON task_assignment "
+    "REFERENCING NEW TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION count_assigned_tasks()",
+    "CREATE TRIGGER count_deleted_assignments AFTER DELETE ON task_assignment "
+    "REFERENCING OLD TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION count_assigned_tasks()",
+]
+
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER count_inserted_tasks AFTER INSERT ON task BEGIN
+        UPDATE project SET task_count = task_count + 1 WHERE id = NEW.project_id;
+    END
+    """,
+    """
+    CREATE TRIGGER count_deleted_tasks AFTER DELETE ON task BEGIN
+        UPDATE project SET task_count = task_count - 1 WHERE id = OLD.project_id;
+    END
+    """,
+    """
+    CREATE TRIGGER count_inserted_assignments AFTER INSERT ON task_assignment BEGIN
+        INSERT INTO assigned_task_count (project_id, user_id, task_count)
+        SELECT project_id, NEW.user_id, 1 FROM task WHERE id = NEW.task_id
+        ON CONFLICT (project_id, user_id) DO UPDATE SET task_count = task_count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER count_deleted_assignments AFTER DELETE ON task_assignment BEGIN
+        UPDATE assigned_task_count SET task_count = task_count - 1
+        WHERE user_id = OLD.user_id AND project_id = (SELECT project_id FROM task WHERE id = OLD.task_id);
+    END
+    """,
+]
+
+TRIGGERS = [
+    ('count_inserted_tasks', 'task'),
+    ('count_deleted_tasks', 'task'),
+    ('count_inserted_assignments', 'task_assignment'),
+    ('count_deleted_assignments', 'task_assignment'),
+]
+
+
+def upgrade():
+    op.add_column('project', sa.Column('task_count', sa.BigInteger(), server_default='0', nullable=False))
+    op.create_table('assigned_task_count',
+    sa.Column('project_id', sa.BigInteger(), nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('task_count', sa.BigInteger(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['project.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('project_id', 'user_id')
+    )
+
+    # Creating the triggers locks out task writes until the backfill below is committed
+    dialect = op.get_bind().dialect.name
+    for statement in {'postgresql': POSTGRESQL_TRIGGERS, 'sqlite': SQLITE_TRIGGERS}.get(dialect, []):
+        op.execute(statement)
+
+    op.execute(
+        "UPDATE project SET task_count = (SELECT count(*) FROM task WHERE task.project_id = project.id)"
+    )
+    op.execute(
+        "INSERT INTO assigned_task_count (project_id, user_id, task_count) "
+        "SELECT task.project_id, task_assignment.user_id, count(*) "
+        "FROM task_assignment JOIN task ON task.id = task_assignment.task_id "
+        "GROUP BY task.project_id, task_assignment.user_id"
+    )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        for name, table in reversed(TRIGGERS):
+            op.execute(f"DROP TRIGGER IF EXISTS {name}" + (f" ON {table}" if dialect == 'postgresql' else ""))
+    if dialect == 'postgresql':
+        op.execute("DROP FUNCTION IF EXISTS count_assigned_tasks(), count_tasks()")
+
+    op.drop_table('assigned_task_count')
+    op.drop_column('project', 'task_count')
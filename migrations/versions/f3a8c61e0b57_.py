@@ -0,0 +1,79 @@
+"""add task full-text search
+
+Revision ID: f3a8c61e0b57
+Revises: e5b9d2c4f871
+Create Date: 2026-10-18 18:05:33.740162
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8c61e0b57'
+down_revision = 'e5b9d2c4f871'
+branch_labels = None
+depends_on = None
+
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER index_inserted_task AFTER INSERT ON task BEGIN
+        INSERT INTO task_search (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+    END
+    """,
+    """
+    CREATE TRIGGER index_deleted_task AFTER DELETE ON task BEGIN
+        INSERT INTO task_search (task_search, rowid, title, description)
+        VALUES ('delete', OLD.id, OLD.title, OLD.description);
+    END
+    """,
+    """
+    CREATE TRIGGER index_updated_task AFTER UPDATE OF title, description ON task BEGIN
+        INSERT INTO task_search (task_search, rowid, title, description)
+        VALUES ('delete', OLD.id, OLD.title, OLD.description);
+        INSERT INTO task_search (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+    END
+    """,
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        # Adding a stored generated column rewrites the table under an exclusive lock,
+        # run it in a maintenance window on large tables
+        op.execute(
+            "ALTER TABLE task ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') "
+            "|| setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+            ") STORED"
+        )
+        with op.get_context().autocommit_block():
+            op.create_index(
+                'ix_task_search_vector', 'task', ['search_vector'],
+                postgresql_using='gin', postgresql_concurrently=True,
+            )
+
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE task_search USING fts5("
+            "title, description, content='task', content_rowid='id', tokenize='porter unicode61')"
+        )
+        for statement in SQLITE_TRIGGERS:
+            op.execute(statement)
+        op.execute("INSERT INTO task_search (task_search) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index('ix_task_search_vector', table_name='task', postgresql_concurrently=True)
+        op.drop_column('task', 'search_vector')
+
+    elif dialect == 'sqlite':
+        for name in ('index_updated_task', 'index_deleted_task', 'index_inserted_task'):
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        op.execute("DROP TABLE IF EXISTS task_search")
@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy import BigInteger, event
+from sqlalchemy.ext.compiler import compiles
+
+from todo import config
+from todo.app import create_app
+from todo.extensions import db
+
+
+@compiles(BigInteger, "sqlite")
+def _compile_big_integer(type_, compiler, **kw):
+    """SQLite only generates the primary keys of INTEGER columns"""
+    return "INTEGER"
+
+
+@pytest.fixture
+def config_overrides():
+    """Settings replacing the ones of `todo.config`, override it in a test module to change them"""
+    return {}
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch, config_overrides):
+    monkeypatch.setattr(config, "SECRET_KEY", "test-secret-key-of-32-characters")
+    monkeypatch.setattr(config, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'todo.sqlite'}")
+    for name, value in config_overrides.items():
+        monkeypatch.setattr(config, name, value)
+    app = create_app(testing=True)
+
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.get_engine().dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def login(client):
+    """Sign a user up on first use, and return the headers of a fresh access token"""
+
+    def login(username):
+        credentials = {"username": username, "password": "password"}
+        response = client.post("/auth/login", json=credentials)
+        if response.status_code != 200:
+            response = client.post("/auth/signup", json={**credentials, "email": f"{username}@example.com"})
+        return {"Authorization": f"Bearer {response.json['access_token']}"}
+
+    return login
+
+
+@pytest.fixture
+def queries(app):
+    """Statements sent to the primary database, with a ``COMMIT`` entry for each commit"""
+    statements = []
+    with app.app_context():
+        engine = db.get_engine()
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    event.listen(engine, "commit", lambda conn: statements.append("COMMIT"))
+    return statements
+
+
+@pytest.fixture
+def project(client, login):
+    """ID of a project managed by alice, with bob as a developer"""
+    alice = login("alice")
+    login("bob")
+    project_id = client.post("/api/v1/projects", json={"name": "project"}, headers=alice).json["project"]["id"]
+    client.post(f"/api/v1/projects/{project_id}/memberships", json={"user_id": 2, "role": "DEVELOPER"}, headers=alice)
+    return project_id
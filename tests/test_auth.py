@@ -0,0 +1,82 @@
+from sqlalchemy import delete, update
+
+from todo.extensions import db, identity_cache, response_cache
+from todo.models import ProjectMembership, User
+
+
+def test_membership_change_from_another_worker(app, client, login, project):
+    app.config["JWT_PROJECT_CLAIMS"] = True
+    bob = login("bob")
+    assert client.get(f"/api/v1/projects/{project}/tasks", headers=bob).status_code == 200
+
+    # Written like another worker would, without evicting the identity cached by this one
+    with app.app_context():
+        db.session.execute(
+            delete(ProjectMembership).where(ProjectMembership.project_id == project, ProjectMembership.user_id == 2)
+        )
+        db.session.execute(update(User).where(User.id == 2).values(membership_version=User.membership_version + 1))
+        db.session.commit()
+
+    response = client.get(f"/api/v1/projects/{project}/tasks", headers=bob)
+    assert response.status_code == 401
+
+
+def _membership_queries(queries):
+    return [statement for statement in queries if "FROM project_membership" in statement]
+
+
+def test_claims_resolve_roles_without_query(app, client, login, project, queries):
+    app.config["JWT_PROJECT_CLAIMS"] = True
+    bob = login("bob")
+    queries.clear()
+
+    response = client.get(f"/api/v1/projects/{project}/tasks", headers=bob)
+
+    assert response.status_code == 200
+    assert _membership_queries(queries) == []
+
+
+def test_claims_over_the_limit_fall_back_to_query(app, client, login, project, queries):
+    app.config.update(JWT_PROJECT_CLAIMS=True, JWT_PROJECT_CLAIMS_LIMIT=0)
+    bob = login("bob")
+    queries.clear()
+
+    response = client.get(f"/api/v1/projects/{project}/tasks", headers=bob)
+
+    assert response.status_code == 200
+    assert _membership_queries(queries) != []
+
+
+def test_claims_deny_projects_left_out(app, client, login, project):
+    app.config["JWT_PROJECT_CLAIMS"] = True
+    carol = login("carol")
+
+    response = client.get(f"/api/v1/projects/{project}/tasks", headers=carol)
+
+    assert response.status_code == 403
+
+
+def test_token_of_deleted_user(app, client, login):
+    carol = login("carol")
+    with app.app_context():
+        db.session.delete(User.query.filter_by(username="carol").one())
+        db.session.commit()
+
+    assert client.get("/api/v1/projects", headers=carol).status_code == 401
+    assert client.post("/api/v1/projects", json={"name": "project"}, headers=carol).status_code == 401
+
+
+def test_token_without_claims_reads_cached_identity(client, login, project, queries, monkeypatch):
+    monkeypatch.setattr(response_cache, "enabled", False)
+    alice = login("alice")
+    client.get("/api/v1/projects", headers=alice)
+    queries.clear()
+
+    assert client.get("/api/v1/projects", headers=alice).status_code == 200
+    assert len(queries) == 4
+
+    identity_cache.pop(1)
+    queries.clear()
+
+    assert client.get("/api/v1/projects", headers=alice).status_code == 200
+    assert len(queries) == 5
@@ -0,0 +1,76 @@
+import pytest
+
+
+@pytest.fixture
+def members(client, login, project):
+    """Carol (3) and Dave (4) are not members yet"""
+    login("carol")
+    login("dave")
+    return project
+
+
+def _roles(client, login, project):
+    projects = client.get("/api/v1/projects", headers=login("alice")).json["results"]
+    memberships = next(p["memberships"] for p in projects if p["id"] == project)
+    return {membership["user_id"]: membership["role"] for membership in memberships}
+
+
+def test_bulk_memberships(client, login, members):
+    response = client.patch(
+        f"/api/v1/projects/{members}/memberships",
+        json={
+            "upsert": [
+                {"user_id": 2, "role": "MANAGER"},
+                {"user_id": 3, "role": "DEVELOPER"},
+                {"user_id": 1, "role": "MANAGER"},
+            ],
+            "remove": [4],
+        },
+        headers=login("alice"),
+    )
+
+    assert response.status_code == 200
+    # Alice already is a manager, and Dave is not a member
+    assert response.json == {"added": [3], "updated": [2], "removed": []}
+    assert _roles(client, login, members) == {1: "MANAGER", 2: "MANAGER", 3: "DEVELOPER"}
+
+
+def test_bulk_remove(client, login, members):
+    response = client.patch(f"/api/v1/projects/{members}/memberships", json={"remove": [2]}, headers=login("alice"))
+
+    assert response.json == {"added": [], "updated": [], "removed": [2]}
+    assert _roles(client, login, members) == {1: "MANAGER"}
+
+
+def test_unknown_users(client, login, members):
+    response = client.patch(
+        f"/api/v1/projects/{members}/memberships",
+        json={
+            "upsert": [
+                {"user_id": 3, "role": "DEVELOPER"},
+                {"user_id": 8, "role": "DEVELOPER"},
+                {"user_id": 9, "role": "MANAGER"},
+            ]
+        },
+        headers=login("alice"),
+    )
+
+    assert response.status_code == 404
+    assert response.json == {"msg": "These users do not exist", "ids": [8, 9]}
+    assert 3 not in _roles(client, login, members)
+
+
+def test_duplicate_users(client, login, members):
+    response = client.patch(
+        f"/api/v1/projects/{members}/memberships",
+        json={"upsert": [{"user_id": 3, "role": "DEVELOPER"}], "remove": [3]},
+        headers=login("alice"),
+    )
+
+    assert response.status_code == 400
+
+
+def test_developer_cannot_change_memberships(client, login, members):
+    response = client.patch(f"/api/v1/projects/{members}/memberships", json={"remove": [1]}, headers=login("bob"))
+
+    assert response.status_code == 403
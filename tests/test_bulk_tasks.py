@@ -0,0 +1,73 @@
+import pytest
+
+
+@pytest.fixture
+def tasks(client, login, project):
+    client.post(f"/api/v1/projects/{project}/tasks/bulk", json=[{"title": "a"}, {"title": "b"}], headers=login("alice"))
+    return project
+
+
+@pytest.mark.parametrize("method, body", [("patch", {"changes": {"title": "c"}}), ("delete", {})])
+def test_empty_filter(client, login, tasks, method, body):
+    alice = login("alice")
+    url = f"/api/v1/projects/{tasks}/tasks"
+
+    response = getattr(client, method)(url, json={**body, "filter": {}}, headers=alice)
+
+    assert response.status_code == 400
+    assert response.json == {"filter": ["At least one criterion is required"]}
+    assert client.get(url, headers=alice).json["total"] == 2
+
+
+@pytest.mark.parametrize("method, body", [("patch", {"changes": {"title": "c"}}), ("delete", {})])
+def test_filter(client, login, tasks, method, body):
+    response = getattr(client, method)(
+        f"/api/v1/projects/{tasks}/tasks", json={**body, "filter": {"title_prefix": "a"}}, headers=login("alice")
+    )
+
+    assert response.json == {"count": 1}
+
+
+def test_bulk_create(client, login, project):
+    response = client.post(
+        f"/api/v1/projects/{project}/tasks/bulk",
+        json=[{"title": "a"}, {"title": "b", "description": "d", "assignees": [2]}],
+        headers=login("alice"),
+    )
+
+    assert response.status_code == 200
+    assert [(task["title"], task["description"], task["assignees"]) for task in response.json["tasks"]] == [
+        ("a", None, [1]),
+        ("b", "d", [2, 1]),
+    ]
+
+
+def test_bulk_create_errors_by_index(client, login, project):
+    alice = login("alice")
+    login("carol")
+    url = f"/api/v1/projects/{project}/tasks"
+
+    response = client.post(
+        f"{url}/bulk",
+        json=[{"title": "valid"}, {"description": "no title"}, {"title": "a", "assignees": [3]}],
+        headers=alice,
+    )
+
+    assert response.status_code == 400
+    assert response.json == {
+        "1": {"title": ["Missing data for required field."]},
+        "2": {"assignees": ["User 3 is not a member of this project"]},
+    }
+    # Nothing is created when any task is invalid
+    assert client.get(url, headers=alice).json["total"] == 0
+
+
+def test_bulk_create_limit(app, client, login, project):
+    app.config["BULK_LIMIT"] = 2
+    alice = login("alice")
+
+    response = client.post(f"/api/v1/projects/{project}/tasks/bulk", json=[{"title": "a"}] * 3, headers=alice)
+
+    assert response.status_code == 400
+    assert response.json == {"msg": "At most 2 tasks can be created at once"}
+    assert client.get(f"/api/v1/projects/{project}/tasks", headers=alice).json["total"] == 0
@@ -0,0 +1,104 @@
+"""List responses carry an ETag, which every write to what they list changes"""
+import pytest
+
+from todo.extensions import response_cache
+
+
+@pytest.fixture(params=[True, False], ids=["cached", "uncached"])
+def cache_enabled(request, monkeypatch):
+    monkeypatch.setattr(response_cache, "enabled", request.param)
+
+
+@pytest.fixture
+def task(client, login, project):
+    return client.post(f"/api/v1/projects/{project}/tasks", json={"title": "task"}, headers=login("alice")).json["task"]
+
+
+def _etag(client, url, headers):
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return response.headers["ETag"]
+
+
+# Method, path formatted with the project and task IDs, and body built from the task ID
+WRITES = {
+    "create task": ("post", "/api/v1/projects/{project}/tasks", {"title": "new"}),
+    "bulk create tasks": ("post", "/api/v1/projects/{project}/tasks/bulk", [{"title": "new"}]),
+    "update task": ("put", "/api/v1/projects/{project}/tasks/{task}", {"title": "renamed"}),
+    "assign task": ("put", "/api/v1/projects/{project}/tasks/{task}", {"assignees": [2]}),
+    "bulk update tasks": (
+        "patch",
+        "/api/v1/projects/{project}/tasks",
+        lambda task_id: {"ids": [task_id], "changes": {"title": "renamed"}},
+    ),
+    "delete task": ("delete", "/api/v1/projects/{project}/tasks/{task}", None),
+    "bulk delete tasks": ("delete", "/api/v1/projects/{project}/tasks", lambda task_id: {"ids": [task_id]}),
+    "add member": ("post", "/api/v1/projects/{project}/memberships", {"user_id": 3, "role": "DEVELOPER"}),
+    "change members": (
+        "patch",
+        "/api/v1/projects/{project}/memberships",
+        {"upsert": [{"user_id": 2, "role": "MANAGER"}]},
+    ),
+    "remove member": ("delete", "/api/v1/projects/{project}/memberships/2", None),
+}
+
+
+def _write(client, name, project, task, headers):
+    method, path, body = WRITES[name]
+    if callable(body):
+        body = body(task["id"])
+    response = getattr(client, method)(path.format(project=project, task=task["id"]), json=body, headers=headers)
+    assert response.status_code < 300
+
+
+@pytest.mark.parametrize("url", ["/api/v1/projects", "/api/v1/projects/{project}/tasks"])
+def test_not_modified(client, login, project, task, cache_enabled, url):
+    alice = login("alice")
+    url = url.format(project=project)
+    etag = _etag(client, url, alice)
+
+    response = client.get(url, headers={**alice, "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+@pytest.mark.parametrize("write", WRITES)
+def test_writes_change_task_list_etag(client, login, project, task, cache_enabled, write):
+    login("carol")
+    alice = login("alice")
+    url = f"/api/v1/projects/{project}/tasks"
+    etag = _etag(client, url, alice)
+
+    _write(client, write, project, task, alice)
+
+    response = client.get(url, headers={**alice, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_assignment_changes_myself_etag(client, login, project, task, cache_enabled):
+    bob = login("bob")
+    url = f"/api/v1/projects/{project}/tasks/myself"
+    etag = _etag(client, url, bob)
+
+    client.put(f"/api/v1/projects/{project}/tasks/{task['id']}", json={"assignees": [2]}, headers=login("alice"))
+
+    response = client.get(url, headers={**bob, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert [t["id"] for t in response.json["results"]] == [task["id"]]
+
+
+@pytest.mark.parametrize("write", ["add member", "change members", "remove member"])
+def test_membership_writes_change_project_list_etag(client, login, project, task, cache_enabled, write):
+    login("carol")
+    alice, bob = login("alice"), login("bob")
+    etags = {name: _etag(client, "/api/v1/projects", headers) for name, headers in (("alice", alice), ("bob", bob))}
+
+    _write(client, write, project, task, alice)
+
+    for name, headers in (("alice", alice), ("bob", bob)):
+        response = client.get("/api/v1/projects", headers={**headers, "If-None-Match": etags[name]})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etags[name]
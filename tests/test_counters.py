@@ -0,0 +1,84 @@
+"""Task counters follow every write, and `flask reconcile-counters` repairs their drift"""
+import pytest
+from sqlalchemy import update
+
+from todo.extensions import db
+from todo.models import AssignedTaskCount, Project
+
+
+def _counts(app, project):
+    with app.app_context():
+        assigned = {
+            counter.user_id: counter.task_count
+            for counter in AssignedTaskCount.query.filter_by(project_id=project)
+            if counter.task_count
+        }
+        return db.session.get(Project, project).task_count, assigned
+
+
+@pytest.fixture
+def tasks(client, login, project):
+    response = client.post(
+        f"/api/v1/projects/{project}/tasks/bulk",
+        json=[{"title": "a"}, {"title": "b", "assignees": [2]}, {"title": "c", "assignees": [2]}],
+        headers=login("alice"),
+    )
+    return [task["id"] for task in response.json["tasks"]]
+
+
+def test_inserts(app, client, login, project, tasks):
+    assert _counts(app, project) == (3, {1: 3, 2: 2})
+
+    client.post(f"/api/v1/projects/{project}/tasks", json={"title": "d", "assignees": [2]}, headers=login("bob"))
+
+    assert _counts(app, project) == (4, {1: 3, 2: 3})
+
+
+def test_deletes(app, client, login, project, tasks):
+    alice = login("alice")
+
+    client.delete(f"/api/v1/projects/{project}/tasks/{tasks[0]}", headers=alice)
+    assert _counts(app, project) == (2, {1: 2, 2: 2})
+
+    client.delete(f"/api/v1/projects/{project}/tasks", json={"filter": {"assignee": 2}}, headers=alice)
+    assert _counts(app, project) == (0, {})
+
+
+def test_reassignments(app, client, login, project, tasks):
+    alice = login("alice")
+
+    client.put(f"/api/v1/projects/{project}/tasks/{tasks[0]}", json={"assignees": [2]}, headers=alice)
+    assert _counts(app, project) == (3, {1: 2, 2: 3})
+
+    client.put(f"/api/v1/projects/{project}/tasks/{tasks[1]}", json={"assignees": []}, headers=alice)
+    assert _counts(app, project) == (3, {1: 1, 2: 2})
+
+
+@pytest.fixture
+def drifted(app, project, tasks):
+    with app.app_context():
+        db.session.execute(update(Project).where(Project.id == project).values(task_count=10))
+        db.session.execute(update(AssignedTaskCount).where(AssignedTaskCount.user_id == 2).values(task_count=0))
+        db.session.commit()
+    return project
+
+
+def test_reconcile_dry_run(app, drifted):
+    result = app.test_cli_runner().invoke(args=["reconcile-counters", "--dry-run"])
+
+    assert result.exit_code == 0, result.output
+    assert result.output.splitlines() == [
+        f"project {drifted}: task counter at 10 instead of 3",
+        f"project {drifted}, user 2: assigned task counter at 0 instead of 2",
+        "2 counters drifted",
+    ]
+    assert _counts(app, drifted) == (10, {1: 3})
+
+
+def test_reconcile(app, drifted):
+    result = app.test_cli_runner().invoke(args=["reconcile-counters"])
+
+    assert result.exit_code == 0, result.output
+    assert result.output.splitlines()[-1] == "2 counters repaired"
+    assert _counts(app, drifted) == (3, {1: 3, 2: 2})
+    assert app.test_cli_runner().invoke(args=["reconcile-counters"]).output == "0 counters repaired\n"
@@ -0,0 +1,18 @@
+from todo import config
+from todo.app import create_app
+from todo.commons.database import POOL_PGBOUNCER
+from todo.extensions import db
+
+
+def test_statement_timeout_listener_registered_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "SECRET_KEY", "test-secret-key-of-32-characters")
+    monkeypatch.setattr(config, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'todo.sqlite'}")
+    monkeypatch.setattr(config, "DATABASE_POOL_MODE", POOL_PGBOUNCER)
+    monkeypatch.setattr(config, "DATABASE_STATEMENT_TIMEOUT", 1000)
+
+    for _ in range(3):
+        app = create_app(testing=True)
+
+    with app.app_context():
+        assert len(db.session().dispatch.after_begin) == 1
+        db.session.remove()
@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+
+import pytest
+
+from todo.commons import export, serializers
+
+
+@pytest.fixture
+def tasks(client, login, project):
+    headers = login("alice")
+    client.post(f"/api/v1/projects/{project}/memberships", json={"user_id": 2, "role": "DEVELOPER"}, headers=headers)
+    return [
+        client.post(
+            f"/api/v1/projects/{project}/tasks", json={"title": f"task {i}", "assignees": [1, 2]}, headers=headers
+        ).json["task"]
+        for i in range(3)
+    ]
+
+
+def test_ndjson(client, login, project, tasks):
+    response = client.get(f"/api/v1/projects/{project}/tasks/export", headers=login("alice"))
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert f'filename="project-{project}-tasks.ndjson"' in response.headers["Content-Disposition"]
+    assert [json.loads(line) for line in response.get_data(as_text=True).splitlines()] == tasks
+
+
+def test_ndjson_uses_json_backend(client, login, project, tasks, monkeypatch):
+    headers = login("alice")
+    calls = []
+
+    class Backend(serializers.StdlibJSONBackend):
+        @staticmethod
+        def dumps(obj, **kwargs):
+            calls.append(obj)
+            return serializers.StdlibJSONBackend.dumps(obj, **kwargs)
+
+    monkeypatch.setattr(serializers, "json_backend", Backend)
+    client.get(f"/api/v1/projects/{project}/tasks/export", headers=headers)
+
+    assert all(task in calls for task in tasks)
+
+
+def test_ndjson_batches(client, login, project, tasks, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 2)
+    response = client.get(f"/api/v1/projects/{project}/tasks/export", headers=login("alice"))
+
+    assert [json.loads(line)["id"] for line in response.get_data(as_text=True).splitlines()] == [
+        task["id"] for task in tasks
+    ]
+
+
+def test_csv(client, login, project, tasks):
+    response = client.get(
+        f"/api/v1/projects/{project}/tasks/export?format=csv&fields=id,title,assignees", headers=login("alice")
+    )
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    assert list(csv.reader(io.StringIO(response.get_data(as_text=True)))) == [
+        ["id", "title", "assignees"],
+        *([str(task["id"]), task["title"], " ".join(str(a) for a in task["assignees"])] for task in tasks),
+    ]
+
+
+def test_unknown_format(client, login, project):
+    response = client.get(f"/api/v1/projects/{project}/tasks/export?format=xml", headers=login("alice"))
+
+    assert response.status_code == 400
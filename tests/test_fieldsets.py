@@ -0,0 +1,27 @@
+import pytest
+
+
+@pytest.fixture
+def task(client, login, project):
+    return client.post(f"/api/v1/projects/{project}/tasks", json={"title": "task"}, headers=login("alice")).json["task"]
+
+
+@pytest.mark.parametrize("fields", ["", ",", " "])
+def test_empty_fields(client, login, project, task, fields):
+    response = client.get(f"/api/v1/projects/{project}/tasks?fields={fields}", headers=login("alice"))
+
+    assert response.status_code == 200
+    assert response.json["results"] == [task]
+
+
+def test_some_fields(client, login, project, task):
+    response = client.get(f"/api/v1/projects/{project}/tasks?fields=id,title", headers=login("alice"))
+
+    assert response.json["results"] == [{"id": task["id"], "title": "task"}]
+
+
+def test_unknown_fields(client, login, project):
+    response = client.get(f"/api/v1/projects/{project}/tasks?fields=id,owner", headers=login("alice"))
+
+    assert response.status_code == 400
+    assert response.json == {"fields": ["Unknown field(s) owner, use: id, title, description, project, assignees"]}
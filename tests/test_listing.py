@@ -0,0 +1,49 @@
+"""Filters and sorts of the task lists, each combination served by an index"""
+import pytest
+
+
+@pytest.fixture
+def tasks(client, login, project):
+    client.post(
+        f"/api/v1/projects/{project}/tasks/bulk",
+        json=[{"title": "b"}, {"title": "a", "assignees": [2]}, {"title": "ab"}],
+        headers=login("alice"),
+    )
+    return project
+
+
+@pytest.mark.parametrize(
+    "query, titles",
+    [
+        ("", ["b", "a", "ab"]),
+        ("sort=-id", ["ab", "a", "b"]),
+        ("sort=title", ["a", "ab", "b"]),
+        ("sort=-title", ["b", "ab", "a"]),
+        ("sort=title&title_prefix=a", ["a", "ab"]),
+        ("assignee=2", ["a"]),
+        ("min_id=2&max_id=2", ["a"]),
+    ],
+)
+def test_listing(client, login, tasks, query, titles):
+    response = client.get(f"/api/v1/projects/{tasks}/tasks?{query}", headers=login("alice"))
+
+    assert response.status_code == 200
+    assert [task["title"] for task in response.json["results"]] == titles
+
+
+@pytest.mark.parametrize(
+    "query, errors",
+    [
+        ("title_prefix=a", {"title_prefix": ["Can only be used with sort=title"]}),
+        ("sort=title&min_id=1", {"min_id": ["Can only be used with sort=id"]}),
+        ("sort=owner", {"sort": ["Must be one of: id, -id, title, -title"]}),
+        ("assignee=bob", {"assignee": ["Not a valid integer."]}),
+        ("sort=title&title_prefix=", {"title_prefix": ["Shorter than minimum length 1."]}),
+    ],
+)
+@pytest.mark.parametrize("path", ["tasks", "tasks/myself"])
+def test_invalid_listing(client, login, tasks, path, query, errors):
+    response = client.get(f"/api/v1/projects/{tasks}/{path}?{query}", headers=login("alice"))
+
+    assert response.status_code == 400
+    assert response.json == errors
@@ -0,0 +1,94 @@
+"""The migrations build the schema of the models, on a SQLite database of their own"""
+import shutil
+from pathlib import Path
+
+import flask_migrate
+import pytest
+from sqlalchemy import text
+
+from todo import config
+from todo.app import create_app
+from todo.extensions import db
+from todo.models import Task, User
+from todo.models.task_assignment import task_assignment
+
+MIGRATIONS = Path(__file__).parent.parent / "migrations"
+
+
+@pytest.fixture
+def empty_app(tmp_path, monkeypatch):
+    """App on a database without any table, in its app context"""
+    monkeypatch.setattr(config, "SECRET_KEY", "test-secret-key-of-32-characters")
+    monkeypatch.setattr(config, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'migrated.sqlite'}")
+
+    app = create_app(testing=True)
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.get_engine().dispose()
+
+
+def test_autogenerate_finds_no_changes(empty_app, tmp_path):
+    # A copy, where a revision would be written if autogenerate found changes
+    directory = shutil.copytree(MIGRATIONS, tmp_path / "migrations", ignore=shutil.ignore_patterns("__pycache__"))
+    flask_migrate.upgrade(directory=str(directory))
+    versions = set((directory / "versions").iterdir())
+
+    flask_migrate.migrate(directory=str(directory))
+
+    created = set((directory / "versions").iterdir()) - versions
+    assert not created, "\n".join(path.read_text() for path in created)
+
+
+def _execute(statement):
+    db.session.execute(text(statement))
+    db.session.commit()
+
+
+def _select(statement):
+    rows = db.session.execute(text(statement)).all()
+    db.session.commit()
+    return rows
+
+
+def _assigned_task_count(user_id):
+    return _select(f"SELECT task_count FROM assigned_task_count WHERE user_id = {user_id}")[0][0]
+
+
+def test_assignment_triggers(empty_app):
+    flask_migrate.upgrade(directory=str(MIGRATIONS), revision="d2f6a9c3e1b4")
+    _execute("INSERT INTO user (id, username, email, password) VALUES (1, 'alice', 'alice@example.com', '')")
+    _execute("INSERT INTO project (id, name) VALUES (1, 'project')")
+    _execute("INSERT INTO task (id, title, project_id) VALUES (1, 'task', 1), (2, 'other', 1)")
+
+    # The project is read from the row itself
+    _execute("INSERT INTO task_assignment (user_id, task_id, project_id) VALUES (1, 1, 1)")
+    assert _assigned_task_count(1) == 1
+
+    # And read from the task again once downgraded
+    flask_migrate.downgrade(directory=str(MIGRATIONS), revision="b8d4e7a2c915")
+    _execute("INSERT INTO task_assignment (user_id, task_id) VALUES (1, 2)")
+    assert _assigned_task_count(1) == 2
+    _execute("DELETE FROM task_assignment WHERE task_id = 1")
+    assert _assigned_task_count(1) == 1
+
+    flask_migrate.upgrade(directory=str(MIGRATIONS), revision="d2f6a9c3e1b4")
+    assert _select("SELECT user_id, task_id, project_id FROM task_assignment") == [(1, 2, 1)]
+    _execute("DELETE FROM task_assignment WHERE task_id = 2")
+    assert _assigned_task_count(1) == 0
+
+
+def test_assignees_join_on_project(app, project):
+    with app.app_context():
+        task = Task(title="task", project_id=project, assignees=[db.session.get(User, 2)])
+        db.session.add(task)
+        db.session.commit()
+
+        assert db.session.execute(task_assignment.select()).all() == [(2, task.id, project)]
+
+        # An assignment carrying another project is not one of the task's
+        db.session.execute(task_assignment.insert().values(user_id=1, task_id=task.id, project_id=project + 1))
+        db.session.commit()
+        db.session.expire_all()
+
+        assert [user.id for user in db.session.get(Task, task.id).assignees] == [2]
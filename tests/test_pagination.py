@@ -0,0 +1,90 @@
+import pytest
+
+from todo.commons.pagination import encode_cursor
+from todo.extensions import count_cache
+
+
+@pytest.fixture
+def tasks(client, login, project):
+    alice = login("alice")
+    client.post(
+        f"/api/v1/projects/{project}/tasks/bulk",
+        json=[{"title": f"Task {i}", "description": "release notes"} for i in range(5)],
+        headers=alice,
+    )
+    return project
+
+
+@pytest.mark.parametrize(
+    "query, values",
+    [
+        ("", [{}]),
+        ("", [[1]]),
+        ("", ["1"]),
+        ("", [True]),
+        ("", [1.5]),
+        ("", [2**63]),
+        ("", [1, 2]),
+        ("&sort=title", [1, 1]),
+        ("&sort=title", ["Task 1", "2"]),
+        ("&q=release", ["high", 1]),
+        ("&q=release", [float("inf"), 1]),
+    ],
+)
+def test_invalid_cursor(client, login, tasks, query, values):
+    response = client.get(
+        f"/api/v1/projects/{tasks}/tasks?cursor={encode_cursor(values)}{query}", headers=login("alice")
+    )
+
+    assert response.status_code == 400
+    assert response.json == {"cursor": ["Invalid cursor"]}
+
+
+@pytest.mark.parametrize("query", ["", "&sort=title", "&q=release"])
+def test_cursor_pages(client, login, tasks, query):
+    alice = login("alice")
+    url = f"/api/v1/projects/{tasks}/tasks?cursor=&per_page=2{query}"
+    ids = []
+    while url:
+        response = client.get(url, headers=alice)
+        assert response.status_code == 200
+        ids += [task["id"] for task in response.json["results"]]
+        url = response.json["next"]
+
+    assert sorted(ids) == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.parametrize("per_page", [0, -1])
+def test_cursor_page_size(client, login, tasks, per_page):
+    response = client.get(f"/api/v1/projects/{tasks}/tasks?cursor=&per_page={per_page}", headers=login("alice"))
+
+    assert response.status_code == 400
+    assert response.json == {"per_page": ["Must be at least 1"]}
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/api/v1/projects?cursor=&per_page=1&count={count}",
+        "/api/v1/projects/{project}/tasks?cursor=&per_page=2&count={count}&min_id=2",
+        "/api/v1/projects/{project}/tasks?cursor=&per_page=2&count={count}&q=release",
+    ],
+)
+@pytest.mark.parametrize("count", ["exact", "estimated"])
+def test_cursor_total(app, client, login, tasks, url, count):
+    alice = login("alice")
+    client.post("/api/v1/projects", json={"name": "other project"}, headers=alice)
+    client.post("/api/v1/projects", json={"name": "third project"}, headers=alice)
+    url = url.format(project=tasks, count=count)
+    misses = count_cache.stats()["misses"]
+
+    totals = []
+    while url:
+        response = client.get(url, headers=alice)
+        totals.append(response.json["total"])
+        url = response.json["next"]
+
+    assert len(totals) > 1
+    assert len(set(totals)) == 1
+    if count == "estimated":
+        assert count_cache.stats()["misses"] == misses + 1
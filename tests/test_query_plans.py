@@ -0,0 +1,38 @@
+"""Every hot query of the API reads through an index, see `todo.api.plans`"""
+import pytest
+
+from todo.api.plans import hot_statements
+from todo.commons.sql import full_scans
+from todo.extensions import db
+
+
+@pytest.fixture
+def seeded(client, login, project):
+    alice = login("alice")
+    client.post(
+        f"/api/v1/projects/{project}/tasks/bulk",
+        json=[{"title": f"Task {i}", "description": "release notes", "assignees": [2]} for i in range(20)],
+        headers=alice,
+    )
+    client.post("/api/v1/projects", json={"name": "other project"}, headers=alice)
+    return project
+
+
+def test_hot_queries_use_indexes(app, seeded):
+    with app.app_context():
+        task_id = db.session.execute(db.text("SELECT min(id) FROM task")).scalar()
+        statements = hot_statements(seeded, 2, task_id)
+
+        scans = {}
+        for name, statement in statements.items():
+            tables = full_scans(db.session, statement)
+            db.session.rollback()
+            if tables:
+                scans[name] = tables
+
+    assert scans == {}
+
+
+def test_full_scans_are_reported(app, seeded):
+    with app.app_context():
+        assert full_scans(db.session, db.text("SELECT * FROM task WHERE description = 'release notes'")) == ["task"]
@@ -0,0 +1,44 @@
+import pytest
+
+from todo.api.readers import ProjectReader, TaskReader
+from todo.api.resources.project import _member_of
+from todo.api.schemas import ProjectSchema, TaskSchema
+from todo.models import Project, Task
+
+
+@pytest.fixture
+def tasks(client, login, project):
+    alice = login("alice")
+    client.post(f"/api/v1/projects/{project}/tasks", json={"title": "unassigned"}, headers=alice)
+    client.post(
+        f"/api/v1/projects/{project}/tasks",
+        json={"title": "assigned", "description": "both", "assignees": [1, 2]},
+        headers=alice,
+    )
+
+
+@pytest.mark.parametrize("only", [None, ("id",), ("title", "assignees"), ("project", "description")])
+def test_task_reader(app, project, tasks, only):
+    with app.app_context():
+        reader = TaskReader(only, project)
+        rows = reader.query(Task.project_id == project).order_by(Task.id).all()
+        expected = TaskSchema(many=True, only=reader.only).dump(Task.query.order_by(Task.id).all())
+
+        assert reader.dump(rows) == expected
+
+
+@pytest.mark.parametrize("only", [None, ("id",), ("name",), ("memberships",)])
+def test_project_reader(app, project, only):
+    with app.app_context():
+        reader = ProjectReader(only)
+        rows = reader.query(_member_of(2)).all()
+        expected = ProjectSchema(many=True, only=reader.only).dump(Project.query.filter(_member_of(2)).all())
+
+        assert reader.dump(rows) == expected
+
+
+def test_benchmark_lists(app, project, tasks):
+    result = app.test_cli_runner().invoke(args=["benchmark-lists", "--repeat", "1"])
+
+    assert result.exit_code == 0, result.output
+    assert "task list, reader: p50" in result.output
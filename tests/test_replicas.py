@@ -0,0 +1,94 @@
+"""Read replica routing, with a copy of the primary SQLite file as the replica"""
+import shutil
+import sqlite3
+
+import pytest
+from flask import g
+from sqlalchemy import event
+
+from todo.extensions import db, replica_router
+from todo.models import Project
+
+
+@pytest.fixture
+def config_overrides(tmp_path):
+    return {"DATABASE_REPLICA_URIS": [f"sqlite:///{tmp_path / 'replica.sqlite'}"], "RESPONSE_CACHE_ENABLED": True}
+
+
+@pytest.fixture
+def replica(app, project, tmp_path):
+    """Statements sent to the replica, a copy of the primary where the project is renamed"""
+    shutil.copy(tmp_path / "todo.sqlite", tmp_path / "replica.sqlite")
+    with sqlite3.connect(tmp_path / "replica.sqlite") as connection:
+        connection.execute("UPDATE project SET name = 'on replica'")
+
+    # The router is shared by the apps of the test run
+    replica_router.recent_writers.clear()
+    replica_router.recent_tags.clear()
+
+    statements = []
+    with app.app_context():
+        engine = db.get_engine(app, bind="replica_0")
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+
+def _project_names(client, headers):
+    response = client.get("/api/v1/projects", headers=headers)
+    assert response.status_code == 200
+    return [project["name"] for project in response.json["results"]]
+
+
+def test_get_reads_from_replica(client, login, replica):
+    assert _project_names(client, login("bob")) == ["on replica"]
+    assert replica
+
+
+def test_write_pins_session_to_primary(app, project, replica):
+    with app.test_request_context("/api/v1/projects"):
+        g.database_replica = "replica_0"
+        project_ = db.session.get(Project, project)
+        assert project_.name == "on replica"
+
+        project_.name = "renamed"
+        db.session.flush()
+        assert db.session.execute(db.select(Project.name)).scalar() == "renamed"
+        db.session.rollback()
+
+    with app.app_context():
+        assert db.session.get(Project, project).name == "project"
+
+
+def test_read_after_write_stays_on_primary(client, login, project, replica):
+    bob = login("bob")
+    response = client.post(f"/api/v1/projects/{project}/tasks", json={"title": "task"}, headers=bob)
+    assert response.status_code == 200
+    replica.clear()
+
+    assert _project_names(client, bob) == ["project"]
+    assert replica == []
+
+
+def test_cache_refill_after_write_reads_primary(client, login, project, replica):
+    bob = login("bob")
+    assert client.get(f"/api/v1/projects/{project}/tasks", headers=bob).json["total"] == 0
+
+    # Alice's write evicts the cached list, the replica doesn't have her task yet
+    client.post(f"/api/v1/projects/{project}/tasks", json={"title": "task"}, headers=login("alice"))
+
+    response = client.get(f"/api/v1/projects/{project}/tasks", headers=bob)
+    assert (response.headers["X-Cache"], response.json["total"]) == ("MISS", 1)
+    response = client.get(f"/api/v1/projects/{project}/tasks", headers=bob)
+    assert (response.headers["X-Cache"], response.json["total"]) == ("HIT", 1)
+
+
+def test_token_checked_on_primary(app, client, login, project, replica):
+    app.config["JWT_PROJECT_CLAIMS"] = True
+    login("carol")
+    client.post(
+        f"/api/v1/projects/{project}/memberships", json={"user_id": 3, "role": "DEVELOPER"}, headers=login("alice")
+    )
+
+    # Carol's new token has the membership version of the primary, ahead of the replica
+    response = client.get(f"/api/v1/projects/{project}/tasks", headers=login("carol"))
+    assert response.status_code == 200
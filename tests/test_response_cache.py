@@ -0,0 +1,30 @@
+import pytest
+from sqlalchemy import delete, update
+
+from todo.extensions import db
+from todo.models import ProjectMembership, User
+
+
+@pytest.fixture
+def config_overrides():
+    return {"RESPONSE_CACHE_ENABLED": True}
+
+
+@pytest.mark.parametrize("project_claims", [False, True])
+@pytest.mark.parametrize("path", ["tasks", "tasks/myself", "tasks/summary"])
+def test_hit_after_losing_access(app, client, login, project, project_claims, path):
+    app.config["JWT_PROJECT_CLAIMS"] = project_claims
+    bob = login("bob")
+    url = f"/api/v1/projects/{project}/{path}"
+    assert client.get(url, headers=bob).status_code == 200
+    assert client.get(url, headers=bob).headers["X-Cache"] == "HIT"
+
+    # Removed through another worker, which doesn't evict the responses cached by this one
+    with app.app_context():
+        db.session.execute(
+            delete(ProjectMembership).where(ProjectMembership.project_id == project, ProjectMembership.user_id == 2)
+        )
+        db.session.execute(update(User).where(User.id == 2).values(membership_version=User.membership_version + 1))
+        db.session.commit()
+
+    assert client.get(url, headers=login("bob")).status_code == 403
@@ -0,0 +1,60 @@
+import pytest
+
+
+@pytest.fixture
+def task(client, login, project):
+    """Task of Alice, the manager, not assigned to Bob"""
+    return client.post(f"/api/v1/projects/{project}/tasks", json={"title": "task"}, headers=login("alice")).json["task"]
+
+
+@pytest.fixture
+def managed_task(client, login, project):
+    """Task of Bob, not assigned to Alice, the manager"""
+    return client.post(f"/api/v1/projects/{project}/tasks", json={"title": "task"}, headers=login("bob")).json["task"]
+
+
+@pytest.mark.parametrize("method", ["put", "delete"])
+def test_unknown_task(client, login, project, method):
+    response = getattr(client, method)(
+        f"/api/v1/projects/{project}/tasks/42?fields=owner", json={"title": "renamed"}, headers=login("alice")
+    )
+
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("method", ["put", "delete"])
+def test_task_of_another_project(client, login, project, task, method):
+    other = client.post("/api/v1/projects", json={"name": "other"}, headers=login("alice")).json["project"]["id"]
+
+    response = getattr(client, method)(
+        f"/api/v1/projects/{other}/tasks/{task['id']}", json={"title": "renamed"}, headers=login("alice")
+    )
+
+    assert response.status_code == 404
+
+
+def test_access_checked_before_fields(client, login, project, task):
+    response = client.put(
+        f"/api/v1/projects/{project}/tasks/{task['id']}?fields=owner", json={"title": "renamed"}, headers=login("bob")
+    )
+
+    assert response.status_code == 403
+
+
+def test_developer_unassigned(client, login, project, task):
+    response = client.put(
+        f"/api/v1/projects/{project}/tasks/{task['id']}", json={"title": "renamed"}, headers=login("bob")
+    )
+
+    assert response.status_code == 403
+
+
+def test_manager_unassigned(client, login, project, managed_task):
+    alice = login("alice")
+    url = f"/api/v1/projects/{project}/tasks/{managed_task['id']}"
+
+    response = client.put(f"{url}?fields=id,title,assignees", json={"title": "renamed"}, headers=alice)
+
+    assert response.status_code == 200
+    assert response.json == {"task": {"id": managed_task["id"], "title": "renamed", "assignees": [2]}}
+    assert client.delete(url, headers=alice).status_code == 204
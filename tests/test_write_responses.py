@@ -0,0 +1,86 @@
+"""Write endpoints dump their response before committing, nothing is read back after it"""
+
+
+def _after_commit(queries):
+    return queries[len(queries) - queries[::-1].index("COMMIT") :]
+
+
+def _selects(statements):
+    return [statement for statement in statements if statement.lstrip().upper().startswith("SELECT")]
+
+
+def test_create_project(client, login, queries):
+    alice = login("alice")
+    queries.clear()
+
+    response = client.post("/api/v1/projects", json={"name": "project"}, headers=alice)
+
+    assert response.status_code == 200
+    assert response.json["project"]["id"]
+    assert "COMMIT" in queries
+    assert _selects(_after_commit(queries)) == []
+
+
+def test_add_membership(client, login, project, queries):
+    login("carol")
+    alice = login("alice")
+    queries.clear()
+
+    response = client.post(
+        f"/api/v1/projects/{project}/memberships", json={"user_id": 3, "role": "DEVELOPER"}, headers=alice
+    )
+
+    assert response.status_code == 200
+    assert _selects(_after_commit(queries)) == []
+
+
+def test_create_task(client, login, project, queries):
+    alice = login("alice")
+    queries.clear()
+
+    response = client.post(f"/api/v1/projects/{project}/tasks", json={"title": "task", "assignees": [2]}, headers=alice)
+
+    assert response.status_code == 200
+    assert response.json["task"]["id"]
+    assert sorted(response.json["task"]["assignees"]) == [1, 2]
+    assert _selects(_after_commit(queries)) == []
+
+
+def test_update_task(client, login, project, queries):
+    alice = login("alice")
+    task_id = client.post(f"/api/v1/projects/{project}/tasks", json={"title": "task"}, headers=alice).json["task"]["id"]
+    queries.clear()
+
+    response = client.put(
+        f"/api/v1/projects/{project}/tasks/{task_id}", json={"title": "renamed", "assignees": [2]}, headers=alice
+    )
+
+    assert response.status_code == 200
+    assert response.json["task"]["title"] == "renamed"
+    assert response.json["task"]["assignees"] == [2]
+    assert _selects(_after_commit(queries)) == []
+
+
+def test_bulk_writes(client, login, project, queries):
+    alice = login("alice")
+    queries.clear()
+
+    created = client.post(
+        f"/api/v1/projects/{project}/tasks/bulk", json=[{"title": f"task {i}"} for i in range(3)], headers=alice
+    )
+    assert created.status_code == 200
+    assert len(created.json["tasks"]) == 3
+    assert _selects(_after_commit(queries)) == []
+
+    ids = [task["id"] for task in created.json["tasks"]]
+    queries.clear()
+    updated = client.patch(
+        f"/api/v1/projects/{project}/tasks", json={"ids": ids, "changes": {"description": "bulk"}}, headers=alice
+    )
+    assert updated.json == {"count": 3}
+    assert _selects(_after_commit(queries)) == []
+
+    queries.clear()
+    deleted = client.delete(f"/api/v1/projects/{project}/tasks", json={"ids": ids}, headers=alice)
+    assert deleted.json == {"count": 3}
+    assert _selects(_after_commit(queries)) == []
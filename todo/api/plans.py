@@ -0,0 +1,52 @@
+"""Statements run by the hot paths of the API, for ``flask check-plans``
+
+They are built with the same helpers as the endpoints, so that the check follows the
+queries as they change.
+"""
+from sqlalchemy import func, select
+
+from todo.api.readers import ProjectReader, TaskReader
+from todo.api.resources.project import _member_of
+from todo.api.resources.task import TASK_LISTING, _assigned_to, _task_access_query
+from todo.commons.pagination import DEFAULT_PAGE_SIZE
+from todo.models import AssignedTaskCount, Project, ProjectMembership, Task, search_tasks
+
+
+def _page(query, *keys):
+    return query.order_by(*keys).limit(DEFAULT_PAGE_SIZE + 1).statement
+
+
+def _count(query):
+    return select(func.count()).select_from(query.order_by(None).subquery())
+
+
+def hot_statements(project_id, user_id, task_id):
+    """Name and statement of every query to check, for the given sample IDs"""
+    tasks = TaskReader().query(Task.project_id == project_id)
+    my_tasks = TaskReader().query(Task.project_id == project_id, _assigned_to(user_id))
+    projects = ProjectReader().query(_member_of(user_id))
+    by_title = TASK_LISTING.orderings["title"].keys
+    titled = TaskReader().query(Task.project_id == project_id, *TASK_LISTING.criteria({"title_prefix": "T"}))
+    searched, rank = search_tasks(TaskReader().query(Task.project_id == project_id), "task")
+
+    return {
+        "task list page": _page(tasks, Task.id),
+        "task list count": _count(tasks),
+        "task list by title": _page(tasks, *(key.order_by() for key in by_title)),
+        "task list by title, descending": _page(tasks, *(key._replace(descending=True).order_by() for key in by_title)),
+        "task list title prefix": _page(titled, *(key.order_by() for key in by_title)),
+        "task list assignees": TaskReader.assignees_query([task_id], project_id),
+        "task search page": _page(searched, rank.desc(), Task.id),
+        "my task list page": _page(my_tasks, Task.id),
+        "my task list count": _count(my_tasks),
+        "project list page": _page(projects, Project.id),
+        "project list count": _count(projects),
+        "project list memberships": ProjectReader.memberships_query([project_id]),
+        "project role": select(ProjectMembership.role).where(
+            ProjectMembership.user_id == user_id, ProjectMembership.project_id == project_id
+        ),
+        "task access": _task_access_query(project_id, task_id, user_id).statement,
+        "task summary": select(AssignedTaskCount.user_id, AssignedTaskCount.task_count).where(
+            AssignedTaskCount.project_id == project_id
+        ),
+    }
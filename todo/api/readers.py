@@ -0,0 +1,94 @@
+"""Read-only query path for the hot list endpoints
+
+Readers select only the columns their schema dumps, as plain rows: no ORM instances are
+hydrated or tracked in the identity map, and the relationships of a page are aggregated in
+SQL. They can be passed to `paginate` in place of a schema, and dump the exact same JSON.
+
+Pass `only` to select and dump a subset of the fields, see `todo.commons.fieldsets`.
+"""
+from collections import defaultdict
+
+from sqlalchemy import select
+
+from todo.commons.sql import id_array, split_ids
+from todo.extensions import db
+from todo.models import Project, ProjectMembership, Task
+from todo.models.task_assignment import task_assignment
+
+
+class TaskReader:
+    """Task rows, dumped like `TaskSchema(many=True)`
+
+    Assignee IDs of the whole page are aggregated in SQL with one extra query when dumping,
+    restricted to `project_id` when the rows all belong to it.
+    """
+
+    fields = ("id", "title", "description", "project", "assignees")
+
+    def __init__(self, only=None, project_id=None):
+        self.only = tuple(only or self.fields)
+        self.project_id = project_id
+
+    def query(self, *criteria):
+        columns = {
+            "title": Task.title,
+            "description": Task.description,
+            "project": Task.project_id.label("project"),
+        }
+        # The primary key always comes first, for keyset pagination
+        selected = [columns[field] for field in self.only if field in columns]
+        return db.session.query(Task.id, *selected).filter(*criteria)
+
+    @staticmethod
+    def assignees_query(task_ids, project_id=None):
+        query = select(task_assignment.c.task_id, id_array(task_assignment.c.user_id))
+        if project_id is not None:
+            query = query.where(task_assignment.c.project_id == project_id)
+        return query.where(task_assignment.c.task_id.in_(task_ids)).group_by(task_assignment.c.task_id)
+
+    def dump(self, rows):
+        assignees = {}
+        if rows and "assignees" in self.only:
+            assignees = dict(db.session.execute(self.assignees_query([row.id for row in rows], self.project_id)).all())
+
+        return [
+            {
+                field: split_ids(assignees.get(row.id)) if field == "assignees" else getattr(row, field)
+                for field in self.only
+            }
+            for row in rows
+        ]
+
+
+class ProjectReader:
+    """Project rows, dumped like `ProjectSchema(many=True)`
+
+    Memberships of the whole page are read with one extra query when dumping.
+    """
+
+    fields = ("id", "name", "memberships")
+
+    def __init__(self, only=None):
+        self.only = tuple(only or self.fields)
+
+    def query(self, *criteria):
+        selected = [Project.name] if "name" in self.only else []
+        return db.session.query(Project.id, *selected).filter(*criteria)
+
+    @staticmethod
+    def memberships_query(project_ids):
+        return select(ProjectMembership.project_id, ProjectMembership.user_id, ProjectMembership.role).where(
+            ProjectMembership.project_id.in_(project_ids)
+        )
+
+    def dump(self, rows):
+        memberships = defaultdict(list)
+        if rows and "memberships" in self.only:
+            membership_rows = db.session.execute(self.memberships_query([row.id for row in rows]))
+            for project_id, user_id, role in membership_rows:
+                memberships[project_id].append({"user_id": user_id, "role": role.name})
+
+        return [
+            {field: memberships[row.id] if field == "memberships" else getattr(row, field) for field in self.only}
+            for row in rows
+        ]
@@ -1,11 +1,16 @@
+from todo.api.resources.metrics import Metrics
 from todo.api.resources.project import ProjectList, ProjectMembershipList, ProjectMembershipResource
-from todo.api.resources.task import TaskList, MyselfTaskList, TaskResource
+from todo.api.resources.task import TaskList, TaskBulkCreate, TaskExport, TaskSummary, MyselfTaskList, TaskResource
 
 __all__ = [
+    "Metrics",
     "ProjectList",
     "ProjectMembershipList",
     "ProjectMembershipResource",
     "TaskList",
+    "TaskBulkCreate",
+    "TaskExport",
+    "TaskSummary",
     "MyselfTaskList",
     "TaskResource"
 ]
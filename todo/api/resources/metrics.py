@@ -0,0 +1,46 @@
+from flask_jwt_extended import jwt_required
+from flask_restful import Resource
+
+from todo.extensions import count_cache, db, identity_cache, pool_metrics, replica_router, response_cache
+
+
+class Metrics(Resource):
+    """Counters of the worker serving the request
+
+    ---
+    get:
+      tags:
+        - api
+      summary: Get cache, connection pool and replica routing counters
+      description: >
+        Hit and miss counters of the caches, and connection pool metrics, of the worker
+        serving the request since it started
+      responses:
+        200:
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  response_cache:
+                    type: object
+                  count_cache:
+                    type: object
+                  identity_cache:
+                    type: object
+                  database_pool:
+                    type: object
+                  database_replicas:
+                    type: object
+    """
+
+    method_decorators = [jwt_required()]
+
+    def get(self):
+        return {
+            "response_cache": response_cache.stats(),
+            "count_cache": count_cache.stats(),
+            "identity_cache": identity_cache.stats(),
+            "database_pool": pool_metrics.stats(db.engine.pool),
+            "database_replicas": replica_router.stats(),
+        }
@@ -1,23 +1,55 @@
-from flask import request
+from flask import current_app, request
 from flask_jwt_extended import jwt_required, current_user
 from flask_restful import Resource
+from sqlalchemy import delete, func, select
 
-from todo.api.schemas import ProjectSchema, ProjectMembershipSchema
+from todo.api.readers import ProjectReader
+from todo.api.schemas import ProjectSchema, ProjectMembershipBulkSchema, ProjectMembershipSchema
+from todo.auth.claims import get_project_role
+from todo.commons.conditional import etag_headers, is_not_modified, make_etag, not_modified
+from todo.commons.fieldsets import requested_fields
 from todo.commons.pagination import paginate
-from todo.extensions import db
+from todo.commons.response_cache import tag
+from todo.commons.sql import upsert
+from todo.extensions import db, response_cache
 from todo.models import Project, ProjectMembership, User
 
 
 def _check_project_manager_access(project_id):
-    project = Project.query.filter(Project.id == project_id).join(ProjectMembership).first()
-    if (
-            not project
-            or not (m := current_user.get_membership_for_project(project))
-            or m.role != ProjectMembership.Role.MANAGER
-    ):
-        return False, project
+    return get_project_role(project_id) == ProjectMembership.Role.MANAGER
 
-    return True, project
+
+def _member_of(user_id):
+    # Searches the user's memberships, where `Project.memberships.any()` would scan every project
+    return Project.id.in_(select(ProjectMembership.project_id).where(ProjectMembership.user_id == user_id))
+
+
+def _projects_etag():
+    # The membership version changes with the set of projects, the sum with any of them
+    row = (
+        db.session.query(User.membership_version, func.coalesce(func.sum(Project.version), 0))
+        .outerjoin(ProjectMembership, ProjectMembership.user_id == User.id)
+        .outerjoin(Project, Project.id == ProjectMembership.project_id)
+        .filter(User.id == current_user.id)
+        .group_by(User.membership_version)
+        .first()
+    )
+    # Deleted since the token was verified, nothing to list
+    membership_version, versions = row or (None, 0)
+    return make_etag("user", current_user.id, membership_version, versions)
+
+
+def _membership_tags(project_id, *user_ids):
+    """Tags of the cached task lists of the project, and of the project lists of its members
+
+    Read them before committing, to invalidate them once the write is committed.
+    """
+    if not response_cache.enabled:
+        return []
+
+    members = db.session.query(ProjectMembership.user_id).filter(ProjectMembership.project_id == project_id)
+    user_ids = {*user_ids, *(member_id for member_id, in members)}
+    return [tag("project", project_id), *(tag("user", member_id) for member_id in user_ids)]
 
 
 class ProjectMembershipResource(Resource):
@@ -55,9 +87,7 @@ class ProjectMembershipResource(Resource):
     method_decorators = [jwt_required()]
 
     def delete(self, project_id, user_id):
-        authorized, project = _check_project_manager_access(project_id)
-
-        if not authorized:
+        if not _check_project_manager_access(project_id):
             return {"msg": "You do not have access to change this project's memberships"}, 403
 
         membership = ProjectMembership.query.filter(
@@ -69,7 +99,11 @@ class ProjectMembershipResource(Resource):
             return {"msg": "The specified user is not a member of this project"}
 
         db.session.delete(membership)
+        User.bump_membership_version(user_id)
+        Project.bump_version(project_id)
+        tags = _membership_tags(project_id, user_id)
         db.session.commit()
+        response_cache.invalidate(*tags)
 
         return {"msg": "User removed from project"}
 
@@ -108,14 +142,105 @@ class ProjectMembershipList(Resource):
           description: You don't have access to this endpoint
         404:
           description: User does not exist
+    patch:
+      tags:
+        - api
+      summary: Change memberships in bulk
+      description: >
+        Adds users to the project or changes their role (`upsert`), and removes users
+        (`remove`), in a single transaction. Adding an existing member changes their role,
+        removing a user who is not a member does nothing.
+      parameters:
+        - in: path
+          name: project_id
+          schema:
+            type: integer
+      requestBody:
+        content:
+          application/json:
+            schema:
+              ProjectMembershipBulkSchema
+      responses:
+        200:
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  added:
+                    type: array
+                    items:
+                      type: integer
+                  updated:
+                    type: array
+                    items:
+                      type: integer
+                  removed:
+                    type: array
+                    items:
+                      type: integer
+        400:
+          description: The request is invalid, or lists a user more than once
+        403:
+          description: You don't have access to this endpoint
+        404:
+          description: Some users do not exist
     """
 
     method_decorators = [jwt_required()]
 
-    def post(self, project_id):
-        authorized, project = _check_project_manager_access(project_id)
+    def patch(self, project_id):
+        if not _check_project_manager_access(project_id):
+            return {"msg": "You do not have access to change this project's memberships"}, 403
 
-        if not authorized:
+        data = ProjectMembershipBulkSchema().load(request.json)
+        roles = {membership["user_id"]: membership["role"] for membership in data["upsert"]}
+        if len(roles) + len(data["remove"]) > current_app.config["BULK_LIMIT"]:
+            return {"msg": f"At most {current_app.config['BULK_LIMIT']} memberships can be changed at once"}, 400
+
+        missing = set(roles) - set(db.session.execute(select(User.id).where(User.id.in_(roles))).scalars())
+        if missing:
+            return {"msg": "These users do not exist", "ids": sorted(missing)}, 404
+
+        current = dict(
+            db.session.execute(
+                select(ProjectMembership.user_id, ProjectMembership.role).where(
+                    ProjectMembership.project_id == project_id,
+                    ProjectMembership.user_id.in_([*roles, *data["remove"]]),
+                )
+            ).all()
+        )
+        added = sorted(user_id for user_id in roles if user_id not in current)
+        updated = sorted(user_id for user_id, role in roles.items() if user_id in current and current[user_id] != role)
+        removed = sorted(user_id for user_id in data["remove"] if user_id in current)
+
+        upsert(
+            db.session,
+            ProjectMembership.__table__,
+            [{"project_id": project_id, "user_id": user_id, "role": roles[user_id]} for user_id in added + updated],
+            keys=["project_id", "user_id"],
+        )
+        if removed:
+            db.session.execute(
+                delete(ProjectMembership.__table__).where(
+                    ProjectMembership.project_id == project_id,
+                    ProjectMembership.user_id.in_(removed),
+                )
+            )
+
+        changed = added + updated + removed
+        tags = []
+        if changed:
+            User.bump_membership_version(*changed)
+            Project.bump_version(project_id)
+            tags = _membership_tags(project_id, *changed)
+        db.session.commit()
+        response_cache.invalidate(*tags)
+
+        return {"added": added, "updated": updated, "removed": removed}
+
+    def post(self, project_id):
+        if not _check_project_manager_access(project_id):
             return {"msg": "You do not have access to change this project's memberships"}, 403
 
         schema = ProjectMembershipSchema()
@@ -126,15 +251,23 @@ class ProjectMembershipList(Resource):
         if not user:
             return {"msg": "The specified user does not exist"}, 404
 
-        if user.get_membership_for_project(project):
+        if user.get_membership_for_project(project_id):
             return {"msg": "The specified user is already a member of this project"}, 400
 
-        membership.project = project
+        membership.project_id = project_id
 
         db.session.add(membership)
+        db.session.flush()
+        response = {"membership": schema.dump(membership)}
+
+        user_id = membership.user_id
+        User.bump_membership_version(user_id)
+        Project.bump_version(project_id)
+        tags = _membership_tags(project_id, user_id)
         db.session.commit()
+        response_cache.invalidate(*tags)
 
-        return {"membership": schema.dump(membership)}
+        return response
 
 
 class ProjectList(Resource):
@@ -146,6 +279,11 @@ class ProjectList(Resource):
         - api
       summary: Get a list of projects
       description: Get a list of projects that the user have access to
+      parameters:
+        - Cursor
+        - Count
+        - Fields
+        - IfNoneMatch
       responses:
         200:
           content:
@@ -159,11 +297,15 @@ class ProjectList(Resource):
                         type: array
                         items:
                           $ref: '#/components/schemas/ProjectSchema'
+        304:
+          description: The list did not change since the ETag given in If-None-Match
     post:
       tags:
         - api
       summary: Create a project
       description: Creates a new project and adds you as a manager
+      parameters:
+        - Fields
       requestBody:
         content:
           application/json:
@@ -179,24 +321,35 @@ class ProjectList(Resource):
 
     method_decorators = [jwt_required()]
 
+    @response_cache.cached(lambda: [tag("user", current_user.id)])
     def get(self):
-        schema = ProjectSchema(many=True)
+        etag = _projects_etag()
+        if is_not_modified(etag):
+            return not_modified(etag)
 
-        query = Project.query.filter(Project.memberships.any(user=current_user))
+        reader = ProjectReader(requested_fields(ProjectReader.fields))
 
-        return paginate(query, schema)
+        query = reader.query(_member_of(current_user.id))
+
+        return paginate(query, reader), 200, etag_headers(etag)
 
     def post(self):
+        fields = requested_fields(ProjectReader.fields)
         schema = ProjectSchema()
 
         project = schema.load(request.json)
         membership = ProjectMembership(
             role=ProjectMembership.Role.MANAGER,
-            user=current_user,
+            user_id=current_user.id,
         )
 
         db.session.add(project)
         project.memberships.append(membership)
+        db.session.flush()
+        response = {"project": ProjectSchema(only=fields).dump(project)}
+
+        User.bump_membership_version(current_user.id)
         db.session.commit()
+        response_cache.invalidate(tag("user", current_user.id))
 
-        return {"project": schema.dump(project)}
+        return response
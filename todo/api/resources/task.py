@@ -1,19 +1,161 @@
-from flask import request
+from flask import current_app, request
 from flask_jwt_extended import jwt_required, current_user
 from flask_restful import Resource
-
-from todo.api.schemas import TaskSchema
-from todo.commons.pagination import paginate
-from todo.extensions import db
-from todo.models import Project, ProjectMembership, Task, User
+from marshmallow import ValidationError, fields, validate
+from sqlalchemy import and_, delete, exists, select, update
+
+from todo.api.readers import TaskReader
+from todo.api.schemas import TaskBulkUpdateSchema, TaskInputSchema, TaskSchema, TaskSelectionSchema
+from todo.auth.claims import get_project_role
+from todo.commons.conditional import etag_headers, is_not_modified, make_etag, not_modified
+from todo.commons.export import EXPORT_FORMATS, NDJSON, stream_query
+from todo.commons.fieldsets import requested_fields
+from todo.commons.loading import defer_unused_columns
+from todo.commons.pagination import Filter, Listing, Ordering, SortKey, paginate
+from todo.commons.response_cache import tag
+from todo.commons.sql import bytewise, insert_many, prefix_range
+from todo.extensions import db, response_cache
+from todo.models import AssignedTaskCount, Project, ProjectMembership, Task, User, search_tasks
+from todo.models.task_assignment import task_assignment
 
 
 def _check_project_access(project_id):
-    project = Project.query.filter(Project.id == project_id).join(ProjectMembership).first()
-    if not project or not current_user.get_membership_for_project(project):
-        return False, project
+    return get_project_role(project_id) is not None
+
+
+def _assigned_to(user_id):
+    return exists().where(
+        task_assignment.c.task_id == Task.id,
+        task_assignment.c.project_id == Task.project_id,
+        task_assignment.c.user_id == user_id,
+    )
+
+
+TASK_FILTERS = {
+    "assignee": Filter(fields.Int(), _assigned_to),
+    "title_prefix": Filter(
+        fields.Str(validate=validate.Length(min=1)), lambda prefix: prefix_range(bytewise(Task.title), prefix)
+    ),
+    "min_id": Filter(fields.Int(), lambda min_id: Task.id >= min_id),
+    "max_id": Filter(fields.Int(), lambda max_id: Task.id <= max_id),
+}
+
+# Each ordering is served by an index of `Task`, along with the filters it lists
+TASK_LISTING = Listing(
+    TASK_FILTERS,
+    {
+        "id": Ordering([SortKey(Task.id, "id")], frozenset({"assignee", "min_id", "max_id"})),
+        "title": Ordering(
+            [SortKey(bytewise(Task.title), "title"), SortKey(Task.id, "id")], frozenset({"assignee", "title_prefix"})
+        ),
+    },
+    default="id",
+)
+
+
+def _selection_criteria(selection):
+    if "ids" in selection:
+        return [Task.id.in_(selection["ids"])]
+
+    return [TASK_FILTERS[name].criterion(value) for name, value in selection["filter"].items()]
+
+
+def _task_access_query(project_id, task_id, user_id):
+    """The task, the user's role in its project and whether the task is assigned to them"""
+    return (
+        db.session.query(Task, ProjectMembership.role, _assigned_to(user_id).label("assigned"))
+        .outerjoin(
+            ProjectMembership,
+            and_(ProjectMembership.project_id == Task.project_id, ProjectMembership.user_id == user_id),
+        )
+        .filter(Task.id == task_id, Task.project_id == project_id)
+    )
+
+
+def _resolve_selection(project_id, selection):
+    """Return an error response, or the IDs of the selected tasks once the user may change all of them
+
+    Managers may change any task of the project, developers only the tasks assigned to them.
+    Everything is resolved with a single query.
+    """
+    role = get_project_role(project_id)
+    if role is None:
+        return ({"msg": "You do not have access to this project"}, 403), None
+
+    limit = current_app.config["BULK_LIMIT"]
+    rows = db.session.execute(
+        select(Task.id, _assigned_to(current_user.id).label("assigned"))
+        .where(Task.project_id == project_id, *_selection_criteria(selection))
+        .order_by(Task.id)
+        .limit(limit + 1)
+    ).all()
+
+    if len(rows) > limit:
+        return ({"msg": f"At most {limit} tasks can be changed at once, narrow the selection"}, 400), None
+
+    missing = set(selection.get("ids", ())) - {row.id for row in rows}
+    if missing:
+        return ({"msg": "These tasks don't belong to this project", "ids": sorted(missing)}, 404), None
+
+    forbidden = [row.id for row in rows if not row.assigned]
+    if role != ProjectMembership.Role.MANAGER and forbidden:
+        return ({"msg": "You don't have access to these tasks", "ids": forbidden}, 403), None
+
+    return None, [row.id for row in rows]
+
+
+def _load_assignees(project_id, user_ids):
+    """Load the users with a single query, making sure all of them are members of the project"""
+    user_ids = list(dict.fromkeys(user_ids))
+    users = {
+        user.id: user
+        for user in User.query.join(ProjectMembership, ProjectMembership.user_id == User.id).filter(
+            ProjectMembership.project_id == project_id, User.id.in_(user_ids)
+        )
+    }
+
+    missing = [user_id for user_id in user_ids if user_id not in users]
+    if missing:
+        raise ValidationError(
+            {"assignees": [f"User {user_id} is not a member of this project" for user_id in missing]}
+        )
+
+    return [users[user_id] for user_id in user_ids]
+
 
-    return True, project
+def _task_count(project_id):
+    return db.session.query(Project.task_count).filter(Project.id == project_id).scalar() or 0
+
+
+def _assigned_task_count(project_id, user_id):
+    return (
+        db.session.query(AssignedTaskCount.task_count)
+        .filter(AssignedTaskCount.project_id == project_id, AssignedTaskCount.user_id == user_id)
+        .scalar()
+        or 0
+    )
+
+
+def _paginate_tasks(query, reader, total):
+    """Paginate a task list along the filters and sort of the request, or rank its matches when ``q`` is given
+
+    `total` counts the unfiltered list.
+    """
+    terms = request.args.get("q", "").strip()
+    if terms:
+        if "sort" in request.args:
+            raise ValidationError({"sort": ["Search results are sorted by relevance"]})
+        # The full-text index selects the matches, filters only narrow them down
+        query, rank = search_tasks(query.filter(*TASK_LISTING.criteria(request.args)), terms)
+        return paginate(query, reader, keys=[SortKey(rank, "rank", descending=True), SortKey(Task.id, "id")])
+
+    criteria, keys = TASK_LISTING.parse(request.args)
+    return paginate(query.filter(*criteria), reader, total=None if criteria else total, keys=keys)
+
+
+def _tasks_etag(project_id, *extra):
+    version = db.session.query(Project.version).filter(Project.id == project_id).scalar()
+    return make_etag("project", project_id, version, *extra)
 
 
 class TaskResource(Resource):
@@ -34,11 +176,12 @@ class TaskResource(Resource):
           name: task_id
           schema:
             type: integer
+        - Fields
       requestBody:
         content:
           application/json:
             schema:
-              TaskSchema
+              TaskInputSchema
       responses:
         200:
           content:
@@ -47,6 +190,8 @@ class TaskResource(Resource):
                 type: object
                 properties:
                   task: TaskSchema
+        400:
+          description: Some assignees are not members of this project
         403:
           description: You do not have permission to edit this task
         404:
@@ -71,21 +216,22 @@ class TaskResource(Resource):
         403:
           description: You do not have permission to delete this task
         404:
-          description: User does not exist
+          description: Task does not exist
     """
 
     method_decorators = [jwt_required()]
 
     @staticmethod
     def _check_access_to_task(project_id, task_id):
-        task = Task.query.filter(Task.id == task_id).join((User, Task.assignees)).first()
+        """Return an error response, or the task, resolving it with the caller's role and assignment in one query"""
+        row = _task_access_query(project_id, task_id, current_user.id).first()
 
-        if not task or task.project_id != project_id:
-            return "This task doesn't belong to this project", None
+        if row is None:
+            return ({"msg": "This task doesn't exist in this project"}, 404), None
 
-        membership = current_user.get_membership_for_project(task.project)
-        if membership.role != ProjectMembership.Role.MANAGER and current_user not in task.assignees:
-            return "You don't have access to this task", None
+        task, role, assigned = row
+        if role is None or (role != ProjectMembership.Role.MANAGER and not assigned):
+            return ({"msg": "You don't have access to this task"}, 403), None
 
         return None, task
 
@@ -93,27 +239,35 @@ class TaskResource(Resource):
         error, task = self._check_access_to_task(project_id, task_id)
 
         if error:
-            return {"msg": error}, 403
+            return error
 
-        schema = TaskSchema(partial=True)
-        schema.load(request.json, instance=task)
+        fields = requested_fields(TaskReader.fields)
+        data = TaskInputSchema(partial=True).load(request.json)
+        if "assignees" in data:
+            task.assignees = _load_assignees(task.project_id, data.pop("assignees"))
+        for key, value in data.items():
+            setattr(task, key, value)
 
-        for user in task.assignees:
-            if not user.get_membership_for_project(task.project):
-                return {"msg": f"User {user.id} is not a member of this project"}
+        # Dump before committing, which would expire the task and reload it
+        db.session.flush()
+        response = {"task": TaskSchema(only=fields).dump(task)}
 
+        Project.bump_version(task.project_id)
         db.session.commit()
+        response_cache.invalidate(tag("project", project_id))
 
-        return {"task": schema.dump(task)}, 200
+        return response, 200
 
     def delete(self, project_id, task_id):
         error, task = self._check_access_to_task(project_id, task_id)
 
         if error:
-            return {"msg": error}, 403
+            return error
 
         db.session.delete(task)
+        Project.bump_version(task.project_id)
         db.session.commit()
+        response_cache.invalidate(tag("project", project_id))
 
         return {}, 204
 
@@ -132,6 +286,38 @@ class TaskList(Resource):
           name: project_id
           schema:
             type: integer
+        - Search
+        - in: query
+          name: sort
+          schema:
+            type: string
+            enum: [id, -id, title, -title]
+            default: id
+          description: Order of the tasks, descending with a leading `-`
+        - in: query
+          name: assignee
+          schema:
+            type: integer
+          description: Only the tasks assigned to this user
+        - in: query
+          name: title_prefix
+          schema:
+            type: string
+          description: Only the tasks whose title starts with this, case-sensitive. Requires `sort=title`
+        - in: query
+          name: min_id
+          schema:
+            type: integer
+          description: Only the tasks with this ID or a higher one. Requires `sort=id`
+        - in: query
+          name: max_id
+          schema:
+            type: integer
+          description: Only the tasks with this ID or a lower one. Requires `sort=id`
+        - Cursor
+        - Count
+        - Fields
+        - IfNoneMatch
       responses:
         200:
           content:
@@ -145,8 +331,76 @@ class TaskList(Resource):
                         type: array
                         items:
                           $ref: '#/components/schemas/TaskSchema'
+        304:
+          description: The list did not change since the ETag given in If-None-Match
+        400:
+          description: Invalid filter, or filter that can't be combined with the sort
         403:
           description: You don't have access to this endpoint
+    patch:
+      tags:
+        - api
+      summary: Update tasks in bulk
+      description: >
+        Applies the same changes to every selected task, in a single transaction.
+        Managers may change any task, developers only the tasks assigned to them.
+      parameters:
+        - in: path
+          name: project_id
+          schema:
+            type: integer
+      requestBody:
+        content:
+          application/json:
+            schema:
+              TaskBulkUpdateSchema
+      responses:
+        200:
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  count:
+                    type: integer
+        400:
+          description: The selection or the changes are invalid, or select too many tasks
+        403:
+          description: You don't have access to some of the selected tasks
+        404:
+          description: Some of the selected IDs are not tasks of this project
+    delete:
+      tags:
+        - api
+      summary: Delete tasks in bulk
+      description: >
+        Deletes every selected task along with its assignments, in a single transaction.
+        Managers may delete any task, developers only the tasks assigned to them.
+      parameters:
+        - in: path
+          name: project_id
+          schema:
+            type: integer
+      requestBody:
+        content:
+          application/json:
+            schema:
+              TaskSelectionSchema
+      responses:
+        200:
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  count:
+                    type: integer
+        400:
+          description: The selection is invalid, or selects too many tasks
+        403:
+          description: You don't have access to some of the selected tasks
+        404:
+          description: Some of the selected IDs are not tasks of this project
     post:
       tags:
         - api
@@ -157,11 +411,12 @@ class TaskList(Resource):
           name: project_id
           schema:
             type: integer
+        - Fields
       requestBody:
         content:
           application/json:
             schema:
-              TaskSchema
+              TaskInputSchema
       responses:
         200:
           content:
@@ -170,45 +425,308 @@ class TaskList(Resource):
                 type: object
                 properties:
                   task: TaskSchema
+        400:
+          description: Some assignees are not members of this project
         403:
           description: You don't have access to this endpoint
     """
 
     method_decorators = [jwt_required()]
 
+    @response_cache.cached(lambda project_id: [tag("project", project_id)], allowed=_check_project_access)
     def get(self, project_id):
-        authorized, project = _check_project_access(project_id)
+        if not _check_project_access(project_id):
+            return {"msg": "You do not have access to this project"}, 403
+
+        etag = _tasks_etag(project_id)
+        if is_not_modified(etag):
+            return not_modified(etag)
+
+        reader = TaskReader(requested_fields(TaskReader.fields), project_id)
+
+        query = reader.query(Task.project_id == project_id)
+
+        return _paginate_tasks(query, reader, lambda: _task_count(project_id)), 200, etag_headers(etag)
 
-        if not authorized:
+    def post(self, project_id):
+        if not _check_project_access(project_id):
             return {"msg": "You do not have access to this project"}, 403
 
-        schema = TaskSchema(many=True)
+        fields = requested_fields(TaskReader.fields)
+        data = TaskInputSchema().load(request.json)
+
+        task = Task(
+            title=data["title"],
+            description=data.get("description"),
+            project_id=project_id,
+            assignees=_load_assignees(project_id, [*data["assignees"], current_user.id]),
+        )
+
+        db.session.add(task)
+        db.session.flush()
+        response = {"task": TaskSchema(only=fields).dump(task)}
+
+        Project.bump_version(project_id)
+        db.session.commit()
+        response_cache.invalidate(tag("project", project_id))
+
+        return response
+
+    def patch(self, project_id):
+        data = TaskBulkUpdateSchema().load(request.json, partial=True)
+
+        error, ids = _resolve_selection(project_id, data)
+        if error:
+            return error
+
+        if ids:
+            db.session.execute(
+                update(Task).where(Task.id.in_(ids)).values(**data["changes"]).execution_options(synchronize_session=False)
+            )
+            Project.bump_version(project_id)
+        db.session.commit()
+        response_cache.invalidate(tag("project", project_id))
+
+        return {"count": len(ids)}
+
+    def delete(self, project_id):
+        selection = TaskSelectionSchema().load(request.json)
+
+        error, ids = _resolve_selection(project_id, selection)
+        if error:
+            return error
+
+        if ids:
+            db.session.execute(
+                delete(task_assignment).where(
+                    task_assignment.c.project_id == project_id, task_assignment.c.task_id.in_(ids)
+                )
+            )
+            db.session.execute(delete(Task).where(Task.id.in_(ids)).execution_options(synchronize_session=False))
+            Project.bump_version(project_id)
+        db.session.commit()
+        response_cache.invalidate(tag("project", project_id))
+
+        return {"count": len(ids)}
 
-        query = Task.query.filter(Task.project == project)
 
-        return paginate(query, schema)
+class TaskBulkCreate(Resource):
+    """Create many tasks at once
+
+    ---
+    post:
+      tags:
+        - api
+      summary: Create tasks in bulk
+      description: >
+        Creates every task of the list in the specified project, in a single transaction.
+        Assignees are given as user IDs. If any task is invalid, none is created and the
+        errors are reported by index in the list.
+      parameters:
+        - in: path
+          name: project_id
+          schema:
+            type: integer
+        - Fields
+      requestBody:
+        content:
+          application/json:
+            schema:
+              type: array
+              items: TaskInputSchema
+      responses:
+        200:
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  tasks:
+                    type: array
+                    items: TaskSchema
+        400:
+          description: Some tasks are invalid, or too many of them were sent
+        403:
+          description: You don't have access to this endpoint
+    """
+
+    method_decorators = [jwt_required()]
 
     def post(self, project_id):
-        authorized, project = _check_project_access(project_id)
+        if not _check_project_access(project_id):
+            return {"msg": "You do not have access to this project"}, 403
+
+        if not isinstance(request.json, list):
+            return {"msg": "Expected a list of tasks"}, 400
+        if len(request.json) > current_app.config["BULK_LIMIT"]:
+            return {"msg": f"At most {current_app.config['BULK_LIMIT']} tasks can be created at once"}, 400
+
+        fields = requested_fields(TaskReader.fields) or TaskReader.fields
+        try:
+            items, errors = TaskInputSchema(many=True).load(request.json), {}
+        except ValidationError as e:
+            items, errors = e.valid_data, e.messages
+
+        requested = {user_id for item in items for user_id in item.get("assignees", [])}
+        members = set()
+        if requested:
+            members = set(
+                db.session.execute(
+                    select(ProjectMembership.user_id).where(
+                        ProjectMembership.project_id == project_id,
+                        ProjectMembership.user_id.in_(requested),
+                    )
+                ).scalars()
+            )
+        for i, item in enumerate(items):
+            missing = [user_id for user_id in item.get("assignees", []) if user_id not in members]
+            if missing:
+                errors.setdefault(i, {})["assignees"] = [
+                    f"User {user_id} is not a member of this project" for user_id in missing
+                ]
+        if errors:
+            raise ValidationError(errors)
+
+        for item in items:
+            item["assignees"] = list(dict.fromkeys([*item["assignees"], current_user.id]))
+
+        ids = insert_many(
+            db.session,
+            Task,
+            [{"title": item["title"], "description": item.get("description"), "project_id": project_id} for item in items],
+        )
+        assignments = [
+            {"task_id": task_id, "project_id": project_id, "user_id": user_id}
+            for task_id, item in zip(ids, items)
+            for user_id in item["assignees"]
+        ]
+        if assignments:
+            db.session.execute(task_assignment.insert(), assignments)
+
+        if items:
+            Project.bump_version(project_id)
+        db.session.commit()
+        response_cache.invalidate(tag("project", project_id))
 
-        if not authorized:
+        tasks = [{"id": task_id, "project": project_id, **item} for task_id, item in zip(ids, items)]
+        return {"tasks": [{field: task.get(field) for field in fields} for task in tasks]}
+
+
+class TaskExport(Resource):
+    """Export every task of a project
+
+    ---
+    get:
+      tags:
+        - api
+      summary: Export tasks
+      description: Stream all tasks of a project as newline-delimited JSON or CSV, in a single response
+      parameters:
+        - in: path
+          name: project_id
+          schema:
+            type: integer
+        - in: query
+          name: format
+          schema:
+            type: string
+            enum: [ndjson, csv]
+            default: ndjson
+        - Fields
+      responses:
+        200:
+          content:
+            application/x-ndjson:
+              schema:
+                $ref: '#/components/schemas/TaskSchema'
+            text/csv:
+              schema:
+                type: string
+        400:
+          description: Unknown export format
+        403:
+          description: You don't have access to this endpoint
+    """
+
+    method_decorators = [jwt_required()]
+
+    def get(self, project_id):
+        if not _check_project_access(project_id):
             return {"msg": "You do not have access to this project"}, 403
 
-        schema = TaskSchema()
+        export_format = request.args.get("format", NDJSON)
+        if export_format not in EXPORT_FORMATS:
+            return {"msg": f"Unknown export format, use one of: {', '.join(EXPORT_FORMATS)}"}, 400
 
-        task = schema.load(request.json)
+        fields = requested_fields(TaskReader.fields) or list(TaskReader.fields)
+        query = Task.query.filter(Task.project_id == project_id).order_by(Task.id)
 
-        for user in task.assignees:
-            if not user.get_membership_for_project(project):
-                return {"msg": f"User {user.id} is not a member of this project"}
+        return stream_query(
+            defer_unused_columns(query, fields),
+            TaskSchema(only=fields),
+            export_format,
+            fields=fields,
+            filename=f"project-{project_id}-tasks",
+        )
 
-        task.project = project
-        task.assignees.append(current_user)
 
-        db.session.add(task)
-        db.session.commit()
+class TaskSummary(Resource):
+    """Task counts of a project
+
+    ---
+    get:
+      tags:
+        - api
+      summary: Get task counts
+      description: Number of tasks of the project, in total and per assignee
+      parameters:
+        - in: path
+          name: project_id
+          schema:
+            type: integer
+      responses:
+        200:
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  total:
+                    type: integer
+                  assigned_to_me:
+                    type: integer
+                  assignees:
+                    type: array
+                    items:
+                      type: object
+                      properties:
+                        user_id:
+                          type: integer
+                        count:
+                          type: integer
+        403:
+          description: You don't have access to this endpoint
+    """
+
+    method_decorators = [jwt_required()]
+
+    @response_cache.cached(lambda project_id: [tag("project", project_id)], allowed=_check_project_access)
+    def get(self, project_id):
+        if not _check_project_access(project_id):
+            return {"msg": "You do not have access to this project"}, 403
 
-        return {"task": schema.dump(task)}
+        counts = (
+            db.session.query(AssignedTaskCount.user_id, AssignedTaskCount.task_count)
+            .filter(AssignedTaskCount.project_id == project_id, AssignedTaskCount.task_count > 0)
+            .order_by(AssignedTaskCount.user_id)
+            .all()
+        )
+
+        return {
+            "total": _task_count(project_id),
+            "assigned_to_me": dict(counts).get(current_user.id, 0),
+            "assignees": [{"user_id": user_id, "count": count} for user_id, count in counts],
+        }
 
 
 class MyselfTaskList(Resource):
@@ -225,6 +743,38 @@ class MyselfTaskList(Resource):
           name: project_id
           schema:
             type: integer
+        - Search
+        - in: query
+          name: sort
+          schema:
+            type: string
+            enum: [id, -id, title, -title]
+            default: id
+          description: Order of the tasks, descending with a leading `-`
+        - in: query
+          name: assignee
+          schema:
+            type: integer
+          description: Only the tasks assigned to this user
+        - in: query
+          name: title_prefix
+          schema:
+            type: string
+          description: Only the tasks whose title starts with this, case-sensitive. Requires `sort=title`
+        - in: query
+          name: min_id
+          schema:
+            type: integer
+          description: Only the tasks with this ID or a higher one. Requires `sort=id`
+        - in: query
+          name: max_id
+          schema:
+            type: integer
+          description: Only the tasks with this ID or a lower one. Requires `sort=id`
+        - Cursor
+        - Count
+        - Fields
+        - IfNoneMatch
       responses:
         200:
           content:
@@ -238,20 +788,31 @@ class MyselfTaskList(Resource):
                         type: array
                         items:
                           $ref: '#/components/schemas/TaskSchema'
+        304:
+          description: The list did not change since the ETag given in If-None-Match
+        400:
+          description: Invalid filter, or filter that can't be combined with the sort
         403:
           description: You don't have access to this endpoint
     """
 
     method_decorators = [jwt_required()]
 
+    @response_cache.cached(lambda project_id: [tag("project", project_id)], allowed=_check_project_access)
     def get(self, project_id):
-        authorized, project = _check_project_access(project_id)
-
-        if not authorized:
+        if not _check_project_access(project_id):
             return {"msg": "You do not have access to this project"}, 403
 
-        schema = TaskSchema(many=True)
+        etag = _tasks_etag(project_id, "user", current_user.id)
+        if is_not_modified(etag):
+            return not_modified(etag)
+
+        reader = TaskReader(requested_fields(TaskReader.fields), project_id)
 
-        query = Task.query.filter(Task.project == project, Task.assignees.any(id=current_user.id))
+        query = reader.query(Task.project_id == project_id, _assigned_to(current_user.id))
 
-        return paginate(query, schema)
+        return (
+            _paginate_tasks(query, reader, lambda: _assigned_task_count(project_id, current_user.id)),
+            200,
+            etag_headers(etag),
+        )
@@ -1,7 +1,7 @@
 from todo.api.schemas.project import ProjectSchema
-from todo.api.schemas.project_membership import ProjectMembershipSchema
-from todo.api.schemas.task import TaskSchema
+from todo.api.schemas.project_membership import ProjectMembershipBulkSchema, ProjectMembershipSchema
+from todo.api.schemas.task import TaskBulkUpdateSchema, TaskInputSchema, TaskSchema, TaskSelectionSchema
 from todo.api.schemas.user import UserSchema
 
 
-__all__ = ["UserSchema", "TaskSchema", "ProjectSchema", "ProjectMembershipSchema"]
+__all__ = ["UserSchema", "TaskSchema", "TaskInputSchema", "TaskSelectionSchema", "TaskBulkUpdateSchema", "ProjectSchema", "ProjectMembershipSchema", "ProjectMembershipBulkSchema"]
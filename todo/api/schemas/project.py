@@ -1,8 +1,9 @@
 from todo.models import Project
+from todo.commons.serializers import CompiledDumpMixin
 from todo.extensions import ma, db
 
 
-class ProjectSchema(ma.SQLAlchemyAutoSchema):
+class ProjectSchema(CompiledDumpMixin, ma.SQLAlchemyAutoSchema):
 
     id = ma.Int(dump_only=True)
     memberships = ma.Nested("ProjectMembershipSchema", many=True, dump_only=True)
@@ -11,3 +12,4 @@ class ProjectSchema(ma.SQLAlchemyAutoSchema):
         model = Project
         sqla_session = db.session
         load_instance = True
+        exclude = ("version", "task_count")
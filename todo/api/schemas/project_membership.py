@@ -1,10 +1,12 @@
+from marshmallow import ValidationError, validates_schema
 from marshmallow_enum import EnumField
 
+from todo.commons.serializers import CompiledDumpMixin
 from todo.extensions import ma, db
 from todo.models import ProjectMembership
 
 
-class ProjectMembershipSchema(ma.SQLAlchemyAutoSchema):
+class ProjectMembershipSchema(CompiledDumpMixin, ma.SQLAlchemyAutoSchema):
     role = EnumField(ProjectMembership.Role)
 
     class Meta:
@@ -13,3 +15,17 @@ class ProjectMembershipSchema(ma.SQLAlchemyAutoSchema):
         load_instance = True
         include_fk = True
         exclude = ('project_id',)
+
+
+class ProjectMembershipBulkSchema(ma.Schema):
+    """Memberships to create or change the role of, and users to remove from the project"""
+
+    upsert = ma.List(ma.Nested(ProjectMembershipSchema(load_instance=False)), load_default=list)
+    remove = ma.List(ma.Int(), load_default=list)
+
+    @validates_schema
+    def validate_users(self, data, **kwargs):
+        user_ids = [membership["user_id"] for membership in data["upsert"]] + data["remove"]
+        duplicates = sorted({user_id for user_id in user_ids if user_ids.count(user_id) > 1})
+        if duplicates:
+            raise ValidationError(f"Users listed more than once: {', '.join(map(str, duplicates))}")
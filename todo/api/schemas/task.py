@@ -1,8 +1,11 @@
+from marshmallow import ValidationError, validate, validates_schema
+
 from todo.models import Task
+from todo.commons.serializers import CompiledDumpMixin
 from todo.extensions import ma, db
 
 
-class TaskSchema(ma.SQLAlchemyAutoSchema):
+class TaskSchema(CompiledDumpMixin, ma.SQLAlchemyAutoSchema):
 
     id = ma.Int(dump_only=True)
 
@@ -12,3 +15,50 @@ class TaskSchema(ma.SQLAlchemyAutoSchema):
         load_instance = True
         include_relationships = True
         include_pk = True
+
+
+class TaskInputSchema(TaskSchema):
+    """Loads tasks as plain dicts, with assignees as a list of user IDs
+
+    Assignees are not fetched one by one, so they can be validated against the
+    project's memberships with a single query.
+    """
+
+    assignees = ma.List(ma.Int(), load_default=list)
+
+    class Meta(TaskSchema.Meta):
+        load_instance = False
+        exclude = ("project",)
+
+
+class TaskFilterSchema(ma.Schema):
+    """Criteria selecting tasks of a project, all of them must match"""
+
+    assignee = ma.Int()
+    title_prefix = ma.Str(validate=validate.Length(min=1))
+    min_id = ma.Int()
+    max_id = ma.Int()
+
+
+class TaskSelectionSchema(ma.Schema):
+    """Tasks targeted by a bulk operation, either by ID or with a filter"""
+
+    ids = ma.List(ma.Int(), validate=validate.Length(min=1))
+    filter = ma.Nested(TaskFilterSchema)
+
+    @validates_schema
+    def validate_selection(self, data, **kwargs):
+        if ("ids" in data) == ("filter" in data):
+            raise ValidationError("Exactly one of ids or filter is required")
+        # An empty filter would select every task of the project
+        if "filter" in data and not data["filter"]:
+            raise ValidationError("At least one criterion is required", "filter")
+
+
+class TaskBulkUpdateSchema(TaskSelectionSchema):
+    changes = ma.Nested(TaskInputSchema(only=("title", "description")), required=True)
+
+    @validates_schema
+    def validate_changes(self, data, **kwargs):
+        if not data.get("changes"):
+            raise ValidationError("At least one change is required", "changes")
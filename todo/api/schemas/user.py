@@ -1,8 +1,9 @@
 from todo.models import User
+from todo.commons.serializers import CompiledDumpMixin
 from todo.extensions import ma, db
 
 
-class UserSchema(ma.SQLAlchemyAutoSchema):
+class UserSchema(CompiledDumpMixin, ma.SQLAlchemyAutoSchema):
 
     id = ma.Int(dump_only=True)
     password = ma.String(load_only=True, required=True)
@@ -11,4 +12,4 @@ class UserSchema(ma.SQLAlchemyAutoSchema):
         model = User
         sqla_session = db.session
         load_instance = True
-        exclude = ("_password",)
+        exclude = ("_password", "membership_version")
@@ -2,17 +2,43 @@ from flask import Blueprint, current_app, jsonify
 from flask_restful import Api
 from marshmallow import ValidationError
 
-from todo.extensions import apispec
-from todo.api.resources import ProjectList, ProjectMembershipList, ProjectMembershipResource, TaskList, MyselfTaskList, TaskResource
-from todo.api.schemas import TaskSchema, ProjectSchema, ProjectMembershipSchema
+from todo.commons.serializers import output_json
+from todo.extensions import apispec, replica_router
+from todo.api.resources import (
+    Metrics,
+    ProjectList,
+    ProjectMembershipList,
+    ProjectMembershipResource,
+    TaskList,
+    TaskBulkCreate,
+    TaskExport,
+    TaskSummary,
+    MyselfTaskList,
+    TaskResource,
+)
+from todo.api.schemas import (
+    TaskSchema,
+    TaskInputSchema,
+    TaskSelectionSchema,
+    TaskBulkUpdateSchema,
+    ProjectSchema,
+    ProjectMembershipSchema,
+    ProjectMembershipBulkSchema,
+)
 
 blueprint = Blueprint("api", __name__, url_prefix="/api/v1")
 api = Api(blueprint)
+api.representations["application/json"] = output_json
+replica_router.init_blueprint(blueprint)
 
+api.add_resource(Metrics, "/metrics", endpoint="metrics")
 api.add_resource(ProjectList, "/projects", endpoint="projects")
 api.add_resource(ProjectMembershipList, "/projects/<int:project_id>/memberships", endpoint="project_memberships")
 api.add_resource(ProjectMembershipResource, "/projects/<int:project_id>/memberships/<int:user_id>", endpoint="project_user_membership")
 api.add_resource(TaskList, "/projects/<int:project_id>/tasks", endpoint="tasks_for_project")
+api.add_resource(TaskBulkCreate, "/projects/<int:project_id>/tasks/bulk", endpoint="tasks_bulk_for_project")
+api.add_resource(TaskExport, "/projects/<int:project_id>/tasks/export", endpoint="tasks_export_for_project")
+api.add_resource(TaskSummary, "/projects/<int:project_id>/tasks/summary", endpoint="tasks_summary_for_project")
 api.add_resource(MyselfTaskList, "/projects/<int:project_id>/tasks/myself", endpoint="myself_tasks_for_project")
 api.add_resource(TaskResource, "/projects/<int:project_id>/tasks/<int:task_id>", endpoint="task_resource")
 
@@ -20,12 +46,20 @@ api.add_resource(TaskResource, "/projects/<int:project_id>/tasks/<int:task_id>",
 @blueprint.before_app_first_request
 def register_views():
     apispec.spec.components.schema("TaskSchema", schema=TaskSchema)
+    apispec.spec.components.schema("TaskInputSchema", schema=TaskInputSchema)
+    apispec.spec.components.schema("TaskSelectionSchema", schema=TaskSelectionSchema)
+    apispec.spec.components.schema("TaskBulkUpdateSchema", schema=TaskBulkUpdateSchema)
     apispec.spec.components.schema("ProjectSchema", schema=ProjectSchema)
     apispec.spec.components.schema("ProjectMembershipSchema", schema=ProjectMembershipSchema)
+    apispec.spec.components.schema("ProjectMembershipBulkSchema", schema=ProjectMembershipBulkSchema)
+    apispec.spec.path(view=Metrics, app=current_app)
     apispec.spec.path(view=ProjectList, app=current_app)
     apispec.spec.path(view=ProjectMembershipList, app=current_app)
     apispec.spec.path(view=ProjectMembershipResource, app=current_app)
     apispec.spec.path(view=TaskList, app=current_app)
+    apispec.spec.path(view=TaskBulkCreate, app=current_app)
+    apispec.spec.path(view=TaskExport, app=current_app)
+    apispec.spec.path(view=TaskSummary, app=current_app)
     apispec.spec.path(view=MyselfTaskList, app=current_app)
     apispec.spec.path(view=TaskResource, app=current_app)
 
@@ -2,10 +2,18 @@ from flask import Flask
 from todo import api
 from todo import auth
 from todo import manage
+from todo.commons.database import POOL_PGBOUNCER, engine_options, set_local_statement_timeout
+from todo.commons.replicas import replica_binds
+from todo.commons.serializers import FastJSONProvider, set_json_backend
 from todo.extensions import apispec
+from todo.extensions import count_cache
 from todo.extensions import db
+from todo.extensions import identity_cache
 from todo.extensions import jwt
 from todo.extensions import migrate
+from todo.extensions import pool_metrics
+from todo.extensions import replica_router
+from todo.extensions import response_cache
 
 
 def create_app(testing=False):
@@ -16,6 +24,8 @@ def create_app(testing=False):
     if testing is True:
         app.config["TESTING"] = True
 
+    configure_json(app)
+    configure_database(app)
     configure_extensions(app)
     configure_cli(app)
     configure_apispec(app)
@@ -24,16 +34,42 @@ def create_app(testing=False):
     return app
 
 
+def configure_json(app):
+    """Serialize and parse JSON with the configured backend"""
+    set_json_backend(app.config["JSON_BACKEND"])
+    app.json = FastJSONProvider(app)
+
+
+def configure_database(app):
+    """Set the engine and pool options, and the replica binds, from the DATABASE_* settings"""
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(app.config, pool_metrics))
+    app.config["SQLALCHEMY_BINDS"] = {
+        **(app.config.get("SQLALCHEMY_BINDS") or {}),
+        **replica_binds(app.config["DATABASE_REPLICA_URIS"]),
+    }
+
+    if app.config["DATABASE_POOL_MODE"] == POOL_PGBOUNCER and app.config["DATABASE_STATEMENT_TIMEOUT"]:
+        set_local_statement_timeout(db.session)
+
+
 def configure_extensions(app):
     """Configure flask extensions"""
     db.init_app(app)
     jwt.init_app(app)
     migrate.init_app(app, db)
+    count_cache.init_app(app, "PAGINATION_COUNT_CACHE")
+    identity_cache.init_app(app, "IDENTITY_CACHE")
+    replica_router.init_app(app)
+    response_cache.init_app(app, replica_router)
 
 
 def configure_cli(app):
     """Configure Flask 2.0's cli for easy entity management"""
     app.cli.add_command(manage.init)
+    app.cli.add_command(manage.check_plans)
+    app.cli.add_command(manage.reconcile_counters)
+    app.cli.add_command(manage.benchmark_tasks)
+    app.cli.add_command(manage.benchmark_lists)
 
 
 def configure_apispec(app):
@@ -46,13 +82,63 @@ def configure_apispec(app):
         "PaginatedResult",
         {
             "properties": {
-                "total": {"type": "integer"},
-                "pages": {"type": "integer"},
-                "next": {"type": "string"},
+                "count": {"type": "string", "enum": ["exact", "estimated", "none"]},
+                "total": {"type": "integer", "nullable": True},
+                "pages": {"type": "integer", "nullable": True},
+                "next": {"type": "string", "nullable": True},
                 "prev": {"type": "string"},
             }
         },
     )
+    apispec.spec.components.parameter(
+        "Search",
+        "query",
+        {
+            "name": "q",
+            "schema": {"type": "string"},
+            "example": "release notes",
+            "description": "Full-text search in titles and descriptions. "
+            "Matches are ordered by relevance, and cursors follow that order",
+        },
+    )
+    apispec.spec.components.parameter(
+        "Cursor",
+        "query",
+        {
+            "name": "cursor",
+            "schema": {"type": "string"},
+            "description": "Opaque keyset cursor, pass it empty to start. "
+            "Replaces `page`; `pages` and `prev` are omitted in this mode",
+        },
+    )
+    apispec.spec.components.parameter(
+        "Count",
+        "query",
+        {
+            "name": "count",
+            "schema": {"type": "string", "enum": ["exact", "estimated", "none"]},
+            "description": "How `total` is computed. Defaults to `exact` in page mode and `none` in cursor mode",
+        },
+    )
+    apispec.spec.components.parameter(
+        "Fields",
+        "query",
+        {
+            "name": "fields",
+            "schema": {"type": "string"},
+            "example": "id,title",
+            "description": "Comma separated list of the fields to return, all of them by default",
+        },
+    )
+    apispec.spec.components.parameter(
+        "IfNoneMatch",
+        "header",
+        {
+            "name": "If-None-Match",
+            "schema": {"type": "string"},
+            "description": "ETag of a previous response, answered with 304 when the list did not change",
+        },
+    )
 
 
 def register_blueprints(app):
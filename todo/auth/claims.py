@@ -0,0 +1,57 @@
+"""Project role claims embedded in access tokens
+
+With ``JWT_PROJECT_CLAIMS`` enabled, access tokens carry a compact map of project ID
+to role, and the user's membership version at the time they were issued. Access checks
+trust the map for the lifetime of the token; any membership change bumps the version,
+which makes `user_loader_callback` reject older tokens until they are refreshed.
+The version is read from the user row on every request, a single primary key lookup,
+so that a change made through any worker applies immediately.
+"""
+from flask import current_app
+from flask_jwt_extended import current_user, get_jwt
+
+from todo.extensions import db
+from todo.models import ProjectMembership, User
+
+PROJECTS_CLAIM = "prj"
+VERSION_CLAIM = "mv"
+
+_ROLE_CODES = {
+    ProjectMembership.Role.DEVELOPER: "D",
+    ProjectMembership.Role.MANAGER: "M",
+}
+_ROLES = {code: role for role, code in _ROLE_CODES.items()}
+
+
+def project_claims(user_id):
+    """Additional claims for a new access token of this user, empty when the mode is disabled"""
+    if not current_app.config["JWT_PROJECT_CLAIMS"]:
+        return {}
+
+    limit = current_app.config["JWT_PROJECT_CLAIMS_LIMIT"]
+    rows = (
+        db.session.query(User.membership_version, ProjectMembership.project_id, ProjectMembership.role)
+        .outerjoin(ProjectMembership, ProjectMembership.user_id == User.id)
+        .filter(User.id == user_id)
+        .limit(limit + 1)
+        .all()
+    )
+    if not rows:
+        return {}
+
+    claims = {VERSION_CLAIM: rows[0].membership_version}
+    if len(rows) <= limit:
+        claims[PROJECTS_CLAIM] = {
+            str(row.project_id): _ROLE_CODES[row.role] for row in rows if row.project_id is not None
+        }
+    return claims
+
+
+def get_project_role(project_id):
+    """Role of the current user in a project, or None if they are not a member"""
+    projects = get_jwt().get(PROJECTS_CLAIM)
+    if projects is not None:
+        return _ROLES.get(projects.get(str(project_id)))
+
+    membership = current_user.get_membership_for_project(project_id)
+    return membership.role if membership else None
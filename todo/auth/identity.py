@@ -0,0 +1,79 @@
+"""Lazily loaded identity of the authenticated user
+
+Most endpoints only need `current_user.id`, which is already in the token. The user
+row is only read when another attribute is accessed, and then comes from a per-worker
+identity cache (`todo.extensions.identity_cache`) whenever possible.
+
+Tokens with project claims are checked against a fresh membership version instead: the
+cache of a worker is not invalidated by the membership changes of the others.
+"""
+from flask import g
+from sqlalchemy.orm import make_transient_to_detached
+
+from todo.extensions import db, identity_cache
+from todo.models import User
+
+IDENTITY_COLUMNS = ("id", "username", "email", "membership_version")
+
+
+def get_identity(user_id, fresh=False):
+    """Cached snapshot of the identity columns of a user, or None if it does not exist
+
+    With `fresh`, the snapshot is read from the database once per request, and replaces the
+    cached one. The views verify the token again, after a read replica may have been picked.
+    """
+    fresh_identities = g.setdefault("fresh_identities", {}) if fresh else None
+    snapshot = fresh_identities.get(user_id) if fresh else identity_cache.get(user_id)
+    if snapshot is None:
+        row = (
+            db.session.query(*[getattr(User, column) for column in IDENTITY_COLUMNS])
+            .filter(User.id == user_id)
+            .first()
+        )
+        if row is None:
+            return None
+        snapshot = dict(row._mapping)
+        identity_cache.set(user_id, snapshot)
+        if fresh:
+            fresh_identities[user_id] = snapshot
+    return snapshot
+
+
+def attach_identity(snapshot):
+    """Turn a snapshot into a `User` of the current session, without a SELECT
+
+    Columns missing from the snapshot, such as the password, are loaded on access.
+    """
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+
+class LazyUser:
+    """Stands in for the authenticated `User` until it is actually needed"""
+
+    # Methods of User that only rely on the ID
+    get_membership_for_project = User.get_membership_for_project
+
+    def __init__(self, user_id, snapshot=None):
+        object.__setattr__(self, "id", user_id)
+        object.__setattr__(self, "_snapshot", snapshot)
+        object.__setattr__(self, "_user", None)
+
+    def load(self):
+        """The `User` instance of the current session, loaded on first use"""
+        if self._user is None:
+            snapshot = self._snapshot or get_identity(self.id)
+            if snapshot is None:
+                raise LookupError(f"User {self.id} does not exist")
+            object.__setattr__(self, "_user", attach_identity(snapshot))
+        return self._user
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.load(), name, value)
+
+    def __repr__(self):
+        return "<LazyUser %s>" % self.id
@@ -7,6 +7,8 @@ from flask_jwt_extended import (
 )
 
 from todo.api.schemas import UserSchema
+from todo.auth.claims import VERSION_CLAIM, project_claims
+from todo.auth.identity import LazyUser, get_identity
 from todo.models import User
 from todo.extensions import pwd_context, jwt, apispec, db
 
@@ -49,7 +51,7 @@ def signup():
     db.session.add(user)
     db.session.commit()
 
-    access_token = create_access_token(identity=user.id)
+    access_token = create_access_token(identity=user.id, additional_claims=project_claims(user.id))
     refresh_token = create_refresh_token(identity=user.id)
 
     ret = {"access_token": access_token, "refresh_token": refresh_token}
@@ -109,7 +111,7 @@ def login():
     if user is None or not pwd_context.verify(password, user.password):
         return jsonify({"msg": "Bad credentials"}), 400
 
-    access_token = create_access_token(identity=user.id)
+    access_token = create_access_token(identity=user.id, additional_claims=project_claims(user.id))
     refresh_token = create_refresh_token(identity=user.id)
 
     ret = {"access_token": access_token, "refresh_token": refresh_token}
@@ -144,7 +146,7 @@ def refresh():
     """
     current_user = get_jwt_identity()
 
-    access_token = create_access_token(identity=current_user)
+    access_token = create_access_token(identity=current_user, additional_claims=project_claims(current_user))
 
     ret = {"access_token": access_token}
     return jsonify(ret), 200
@@ -153,7 +155,20 @@ def refresh():
 @jwt.user_lookup_loader
 def user_loader_callback(jwt_headers, jwt_payload):
     identity = jwt_payload["sub"]
-    return User.query.get(identity)
+    if VERSION_CLAIM not in jwt_payload:
+        snapshot = get_identity(identity)
+        return LazyUser(identity, snapshot) if snapshot is not None else None
+
+    # A primary key read: the cached version misses the membership changes of other workers
+    snapshot = get_identity(identity, fresh=True)
+    if snapshot is None or snapshot["membership_version"] != jwt_payload[VERSION_CLAIM]:
+        return None
+    return LazyUser(identity, snapshot)
+
+
+@jwt.user_lookup_error_loader
+def user_lookup_error_callback(jwt_headers, jwt_payload):
+    return jsonify({"msg": "Token is out of date or its user no longer exists, please refresh it"}), 401
 
 
 @blueprint.before_app_first_request
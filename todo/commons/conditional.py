@@ -0,0 +1,26 @@
+"""Conditional GET helpers
+
+List responses are tagged with a weak ETag derived from version counters (see
+`Project.bump_version`), which are cheap to read. When the client's ``If-None-Match``
+matches, the endpoint answers 304 before running any of its list queries.
+"""
+from flask import request
+from werkzeug.http import quote_etag
+
+
+def make_etag(*parts):
+    return "-".join(str(part) for part in parts)
+
+
+def is_not_modified(etag):
+    """Whether the copy cached by the client is still current"""
+    return request.if_none_match.contains_weak(etag)
+
+
+def etag_headers(etag):
+    return {"ETag": quote_etag(etag, weak=True)}
+
+
+def not_modified(etag):
+    """flask-restful response for a 304"""
+    return None, 304, etag_headers(etag)
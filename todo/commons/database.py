@@ -0,0 +1,139 @@
+"""Engine and connection pool settings, read from the ``DATABASE_*`` configuration
+
+Two pooling modes are supported:
+
+- ``queue`` (default), a pool of ``DATABASE_POOL_SIZE`` connections per worker, plus up to
+  ``DATABASE_MAX_OVERFLOW`` temporary ones. Size it so that ``workers * (size + overflow)``
+  stays below Postgres' ``max_connections``.
+- ``pgbouncer``, for a PgBouncer in transaction pooling mode: connections are not pooled
+  by the application, and the statement timeout is set per transaction with ``SET LOCAL``,
+  since PgBouncer rejects it as a startup parameter and shares server sessions.
+
+Pools are instrumented by `PoolMetrics`.
+"""
+import threading
+import time
+
+from sqlalchemy import event, exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, QueuePool
+
+POOL_QUEUE = "queue"
+POOL_PGBOUNCER = "pgbouncer"
+POOL_MODES = (POOL_QUEUE, POOL_PGBOUNCER)
+
+
+class PoolMetrics:
+    """Checkout waits and connection ages of the pools created through `pool_class`"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._opened_at = {}
+        self._lock = threading.Lock()
+
+    def pool_class(self, base):
+        """Subclass of the `base` pool class recording its metrics here"""
+        metrics = self
+
+        class InstrumentedPool(base):
+            def _do_get(self):
+                start = time.perf_counter()
+                try:
+                    return super()._do_get()
+                except exc.TimeoutError:
+                    metrics.record_timeout()
+                    raise
+                finally:
+                    metrics.record_wait(time.perf_counter() - start)
+
+        InstrumentedPool.__name__ = InstrumentedPool.__qualname__ = f"Instrumented{base.__name__}"
+        event.listen(InstrumentedPool, "connect", self._on_connect)
+        event.listen(InstrumentedPool, "close", self._on_close)
+        event.listen(InstrumentedPool, "close_detached", self._on_close)
+        return InstrumentedPool
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self._opened_at[id(dbapi_connection)] = time.monotonic()
+
+    def _on_close(self, dbapi_connection, *args):
+        with self._lock:
+            self._opened_at.pop(id(dbapi_connection), None)
+
+    def stats(self, pool=None):
+        now = time.monotonic()
+        with self._lock:
+            ages = [now - opened_at for opened_at in self._opened_at.values()]
+            stats = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": round(1000 * self.wait_total / self.checkouts, 3) if self.checkouts else 0,
+                "wait_ms_max": round(1000 * self.wait_max, 3),
+                "connections": len(ages),
+                "connection_age_s_max": round(max(ages), 1) if ages else 0,
+                "connection_age_s_avg": round(sum(ages) / len(ages), 1) if ages else 0,
+            }
+
+        if isinstance(pool, QueuePool):
+            stats.update(size=pool.size(), checked_out=pool.checkedout(), overflow=max(pool.overflow(), 0))
+        return stats
+
+
+def engine_options(config, metrics):
+    """`create_engine` arguments for the ``DATABASE_*`` settings of `config`"""
+    mode = config["DATABASE_POOL_MODE"]
+    if mode not in POOL_MODES:
+        raise RuntimeError(f"DATABASE_POOL_MODE must be one of: {', '.join(POOL_MODES)}")
+
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    timeout = config["DATABASE_STATEMENT_TIMEOUT"]
+
+    if url.get_backend_name() == "sqlite":
+        # In-memory databases need the static pool Flask-SQLAlchemy sets up
+        if url.database in (None, "", ":memory:"):
+            return {}
+        return {"poolclass": metrics.pool_class(NullPool)}
+
+    if mode == POOL_PGBOUNCER:
+        return {"poolclass": metrics.pool_class(NullPool)}
+
+    options = {
+        "poolclass": metrics.pool_class(QueuePool),
+        "pool_size": config["DATABASE_POOL_SIZE"],
+        "max_overflow": config["DATABASE_MAX_OVERFLOW"],
+        "pool_timeout": config["DATABASE_POOL_TIMEOUT"],
+        "pool_recycle": config["DATABASE_POOL_RECYCLE"],
+        "pool_pre_ping": config["DATABASE_POOL_PRE_PING"],
+    }
+    if timeout and url.get_backend_name() == "postgresql":
+        options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+def _set_local_statement_timeout(session, transaction, connection):
+    config = session.app.config
+    timeout = config["DATABASE_STATEMENT_TIMEOUT"]
+    if config["DATABASE_POOL_MODE"] == POOL_PGBOUNCER and timeout and connection.dialect.name == "postgresql":
+        connection.execute(text(f"SET LOCAL statement_timeout = {int(timeout)}"))
+
+
+def set_local_statement_timeout(session):
+    """Apply the statement timeout of the session's app to every transaction, for the PgBouncer mode
+
+    The listener is registered once, however many apps share `session`.
+    """
+    if not event.contains(session, "after_begin", _set_local_statement_timeout):
+        event.listen(session, "after_begin", _set_local_statement_timeout)
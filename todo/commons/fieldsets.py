@@ -0,0 +1,20 @@
+"""Sparse fieldsets, requested with ``?fields=id,title``
+"""
+from flask import request
+from marshmallow import ValidationError
+
+
+def requested_fields(available):
+    """Fields listed in the ``fields`` argument, or None when it is absent or empty
+
+    Unknown fields are rejected with a `ValidationError`, which the API turns into a 400.
+    """
+    fields = [field.strip() for field in request.args.get("fields", "").split(",") if field.strip()]
+    if not fields:
+        return None
+
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise ValidationError({"fields": [f"Unknown field(s) {', '.join(unknown)}, use: {', '.join(available)}"]})
+
+    return list(dict.fromkeys(fields))
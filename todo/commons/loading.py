@@ -0,0 +1,46 @@
+"""Eager loading derived from the schema that will dump the query results
+
+Every relationship a schema dumps, either nested or as related keys, is loaded with
+`selectinload`: one extra query per relationship, instead of one per row.
+"""
+from marshmallow.fields import Nested
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only, selectinload
+
+
+def eager_load_options(mapper, schema):
+    options = []
+    for name, field in schema.dump_fields.items():
+        relationship = mapper.relationships.get(field.attribute or name)
+        if relationship is None:
+            continue
+
+        loader = selectinload(relationship.class_attribute)
+        if isinstance(field, Nested):
+            loader = loader.options(*eager_load_options(relationship.mapper, field.schema))
+        options.append(loader)
+    return options
+
+
+def eager_load(query, schema):
+    """Apply the loader options needed to dump the query's entities with `schema`
+
+    Queries of plain columns are returned as is.
+    """
+    description = query.column_descriptions[0]
+    if description["expr"] is not description["entity"]:
+        return query
+
+    mapper = inspect(description["entity"])
+    return query.options(*eager_load_options(mapper, schema))
+
+
+def defer_unused_columns(query, fields):
+    """Only load the columns backing `fields`, plus the keys relationships rely on"""
+    mapper = inspect(query.column_descriptions[0]["entity"])
+    columns = [
+        prop.class_attribute
+        for prop in mapper.column_attrs
+        if prop.key in fields or any(column.primary_key or column.foreign_keys for column in prop.columns)
+    ]
+    return query.options(load_only(*columns))
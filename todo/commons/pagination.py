@@ -1,39 +1,315 @@
 """Simple helper to paginate query
+
+Two modes are supported:
+
+- page mode (``?page=&per_page=``), the original envelope with ``total`` and ``pages``
+- cursor mode (``?cursor=&per_page=``), keyset pagination ordered by primary key, or by
+  the `SortKey` list given to `paginate`. Pass an empty ``cursor`` to get the first page,
+  then follow ``next``.
+
+The ``count`` argument controls how ``total`` is computed: ``exact`` runs a COUNT,
+``estimated`` asks the planner (Postgres) or reuses a short-lived cached count,
+``none`` skips it. Page mode counts exactly by default, cursor mode does not count.
+Endpoints keeping a counter of their items pass it as `total` to skip the COUNT.
+
+`Listing` declares the filters and orderings a list endpoint accepts in its query string.
 """
-from flask import url_for, request
+import base64
+import binascii
+import json
+import math
+from typing import Any, Callable, NamedTuple, Sequence
+
+from flask import abort, url_for, request
+from marshmallow import ValidationError
+from sqlalchemy import and_, inspect, or_
+
+from todo.commons.loading import eager_load
+from todo.commons.sql import Explain
+from todo.extensions import count_cache
 
 DEFAULT_PAGE_SIZE = 50
 DEFAULT_PAGE_NUMBER = 1
 
+COUNT_EXACT = "exact"
+COUNT_ESTIMATED = "estimated"
+COUNT_NONE = "none"
+COUNT_MODES = (COUNT_EXACT, COUNT_ESTIMATED, COUNT_NONE)
 
-def extract_pagination(page=None, per_page=None, **request_args):
+
+def extract_pagination(page=None, per_page=None, cursor=None, count=None, **request_args):
     page = int(page) if page is not None else DEFAULT_PAGE_NUMBER
     per_page = int(per_page) if per_page is not None else DEFAULT_PAGE_SIZE
-    return page, per_page, request_args
+    if cursor is not None and per_page < 1:
+        raise ValidationError({"per_page": ["Must be at least 1"]})
+    if count is None:
+        count = COUNT_NONE if cursor is not None else COUNT_EXACT
+    elif count not in COUNT_MODES:
+        raise ValidationError({"count": [f"Must be one of: {', '.join(COUNT_MODES)}"]})
+    return page, per_page, cursor, count, request_args
+
+
+def _planner_estimate(query):
+    """Read the row estimate of the query's plan, without executing it"""
+    plan = query.session.execute(Explain(query.order_by(None).statement)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _cached_count(query):
+    """Exact count, shared for a few seconds by every request hitting the same endpoint and filter"""
+    compiled = query.order_by(None).statement.compile()
+    key = (request.endpoint, str(compiled), tuple(sorted((k, repr(v)) for k, v in compiled.params.items())))
+
+    total = count_cache.get(key)
+    if total is None:
+        total = query.order_by(None).count()
+        count_cache.set(key, total)
+    return total
+
+
+def count_query(query, mode, total=None):
+    """Number of items of `query` for the `mode`, read from the `total()` counter when given"""
+    if mode == COUNT_NONE:
+        return None
+    if total is not None:
+        return total()
+    if mode == COUNT_ESTIMATED:
+        if query.session.get_bind().dialect.name == "postgresql":
+            return _planner_estimate(query)
+        return _cached_count(query)
+    return query.order_by(None).count()
+
+
+def encode_cursor(values):
+    """Encode the key values of the last item in a page as an opaque token"""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decode a token generated by `encode_cursor`, or None for the first page"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise ValidationError({"cursor": ["Invalid cursor"]})
+    if not isinstance(values, list):
+        raise ValidationError({"cursor": ["Invalid cursor"]})
+    return values
+
+
+class SortKey(NamedTuple):
+    """Column of an ordering, read back from the `attribute` of the items for the cursors"""
+
+    expression: Any
+    attribute: str
+    descending: bool = False
+
+    def order_by(self):
+        return self.expression.desc() if self.descending else self.expression.asc()
+
+    def after(self, value):
+        return self.expression < value if self.descending else self.expression > value
+
+    def accepts(self, value):
+        """Whether `value`, decoded from a cursor, can be compared to the key"""
+        try:
+            python_type = self.expression.type.python_type
+        except NotImplementedError:
+            return False
+        if python_type is int:
+            return type(value) is int and -(2**63) <= value < 2**63
+        if python_type is float:
+            return type(value) in (int, float) and math.isfinite(value)
+        return type(value) is python_type
+
+
+class Filter(NamedTuple):
+    """Query argument loaded with the marshmallow `field`, selecting the rows of `criterion(value)`"""
+
+    field: Any
+    criterion: Callable[[Any], Any]
+
+
+class Ordering(NamedTuple):
+    """Ascending keys of a ``?sort=`` value, ending with a unique one, and the filters its index serves"""
+
+    keys: Sequence[SortKey]
+    filters: frozenset = frozenset()
+
+
+class Listing:
+    """Filters and orderings of a list endpoint, read from the query string
 
+    ``?sort=<name>`` or ``?sort=-<name>`` picks one of `orderings`, `default` when absent.
+    Filters are only accepted along the orderings whose index serves them, so that every
+    page stays an index range scan: other combinations are rejected with a 400.
+    """
+
+    def __init__(self, filters, orderings, default):
+        self.filters = filters
+        self.orderings = orderings
+        self.default = default
+
+    def keys(self, args):
+        """Name of the ordering requested by `args`, and its `SortKey` list"""
+        sort = args.get("sort", self.default)
+        name = sort[1:] if sort.startswith("-") else sort
+        if name not in self.orderings:
+            choices = ", ".join(f"{name}, -{name}" for name in self.orderings)
+            raise ValidationError({"sort": [f"Must be one of: {choices}"]})
+
+        keys = [key._replace(descending=sort.startswith("-")) for key in self.orderings[name].keys]
+        return name, keys
+
+    def criteria(self, args, ordering=None):
+        """Criteria of the filters in `args`, which must be served by the index of `ordering`"""
+        criteria = []
+        errors = {}
+        for name, filter_ in self.filters.items():
+            if name not in args:
+                continue
+            if ordering is not None and name not in self.orderings[ordering].filters:
+                sorts = [sort for sort, candidate in self.orderings.items() if name in candidate.filters]
+                errors[name] = [f"Can only be used with sort={' or sort='.join(sorts)}"]
+                continue
+            try:
+                criteria.append(filter_.criterion(filter_.field.deserialize(args[name])))
+            except ValidationError as e:
+                errors[name] = e.messages
+
+        if errors:
+            raise ValidationError(errors)
+        return criteria
+
+    def parse(self, args):
+        """Criteria and `SortKey` list of the request arguments `args`"""
+        ordering, keys = self.keys(args)
+        return self.criteria(args, ordering), keys
+
+
+def _primary_key(query):
+    """Return the primary key column of the query's entity and the attribute it is mapped to"""
+    mapper = inspect(query.column_descriptions[0]["entity"])
+    column = mapper.primary_key[0]
+    return column, mapper.get_property_by_column(column).key
+
+
+def _after(keys, values):
+    """Rows following `values` in the order of `keys`"""
+    return or_(
+        *(
+            and_(*(previous.expression == value for previous, value in zip(keys[:i], values)), key.after(values[i]))
+            for i, key in enumerate(keys)
+        )
+    )
+
+
+def _select_keys(query, keys):
+    """Add the keys missing from the rows of `query`, their values make the cursors"""
+    descriptions = query.column_descriptions
+    if len(descriptions) == 1 and descriptions[0]["expr"] is descriptions[0]["entity"]:
+        return query  # Rows are instances, the keys are read from their attributes
+
+    selected = {description["name"] for description in descriptions}
+    missing = [key.expression.label(key.attribute) for key in keys if key.attribute not in selected]
+    return query.add_columns(*missing) if missing else query
+
+
+def paginate_cursor(query, schema, cursor, per_page, count, request_args, total=None, keys=None):
+    """Keyset pagination: every page is a single indexed range scan, whatever its depth"""
+    keys = keys or [SortKey(*_primary_key(query))]
+    query = _select_keys(query, keys)
+    # Counted before the cursor filter, so that every page has the same total and count cache key
+    counted = query
+    last = decode_cursor(cursor)
+
+    if last is not None:
+        if len(last) != len(keys) or not all(key.accepts(value) for key, value in zip(keys, last)):
+            raise ValidationError({"cursor": ["Invalid cursor"]})
+        query = query.filter(_after(keys, last))
+
+    items = query.order_by(*(key.order_by() for key in keys)).limit(per_page + 1).all()
+    has_next = len(items) > per_page
+    items = items[:per_page]
+
+    next_ = None
+    if has_next:
+        next_ = url_for(
+            request.endpoint,
+            cursor=encode_cursor([getattr(items[-1], key.attribute) for key in keys]),
+            per_page=per_page,
+            count=count,
+            **request_args,
+            **request.view_args
+        )
+
+    return {
+        "count": count,
+        "total": count_query(counted, count, total),
+        "next": next_,
+        "results": schema.dump(items),
+    }
+
+
+def paginate_pages(query, schema, page, per_page, count, request_args, total=None, keys=None):
+    """Offset pagination, keeping the historical page/total envelope"""
+    if page < 1 or per_page < 0:
+        abort(404)
+
+    if keys:
+        query = query.order_by(*(key.order_by() for key in keys))
+    items = query.limit(per_page + 1).offset((page - 1) * per_page).all()
+    if not items and page != 1:
+        abort(404)
+
+    has_next = len(items) > per_page
+    items = items[:per_page]
+    total = count_query(query, count, total)
+    pages = math.ceil(total / per_page) if total is not None and per_page else None
 
-def paginate(query, schema):
-    page, per_page, other_request_args = extract_pagination(**request.args)
-    page_obj = query.paginate(page=page, per_page=per_page)
     next_ = url_for(
         request.endpoint,
-        page=page_obj.next_num if page_obj.has_next else page_obj.page,
+        page=page + 1 if has_next else page,
         per_page=per_page,
-        **other_request_args,
+        count=count,
+        **request_args,
         **request.view_args
     )
     prev = url_for(
         request.endpoint,
-        page=page_obj.prev_num if page_obj.has_prev else page_obj.page,
+        page=page - 1 if page > 1 else page,
         per_page=per_page,
-        **other_request_args,
+        count=count,
+        **request_args,
         **request.view_args
     )
 
     return {
-        "total": page_obj.total,
-        "pages": page_obj.pages,
+        "count": count,
+        "total": total,
+        "pages": pages,
         "next": next_,
         "prev": prev,
-        "results": schema.dump(page_obj.items),
+        "results": schema.dump(items),
     }
+
+
+def paginate(query, schema, total=None, keys=None):
+    """Paginate `query` according to the request arguments, and dump the page with `schema`
+
+    `schema` only needs a `dump(items)` method, so readers of `todo.api.readers` fit too.
+    `total`, a function returning the number of items of `query`, replaces the COUNT.
+    `keys`, a list of `SortKey` ending with a unique one, replaces the primary key order.
+    """
+    page, per_page, cursor, count, other_request_args = extract_pagination(**request.args)
+    query = eager_load(query, schema)
+
+    if cursor is not None:
+        return paginate_cursor(query, schema, cursor, per_page, count, other_request_args, total, keys)
+
+    return paginate_pages(query, schema, page, per_page, count, other_request_args, total, keys)
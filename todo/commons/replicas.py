@@ -0,0 +1,119 @@
+"""Read replica routing
+
+The GET requests of the API read from one of the ``DATABASE_REPLICA_URIS``, each one
+registered as a ``replica_<n>`` bind of Flask-SQLAlchemy. Everything else stays on the
+primary:
+
+- requests with any other method, and requests outside the routed blueprints;
+- the session of a GET request, from its first flush or DML statement on, so that it
+  reads its own writes;
+- the GET requests of a user during ``DATABASE_REPLICA_STICKINESS`` seconds after one
+  of their writes succeeded, covering the replication lag. Like the other caches, the
+  window is tracked per worker.
+- the GET requests refilling a response cache entry whose tags were invalidated during
+  the same window, so that a lagging replica doesn't cache stale data under them again.
+
+Authentication runs on the primary, before the replica is picked, so that a lagging
+replica never rejects a token issued after a membership change.
+"""
+import random
+import threading
+
+from flask import g, has_app_context, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_sqlalchemy import SignallingSession, SQLAlchemy, get_state
+from sqlalchemy import orm
+
+from todo.commons.cache import TTLCache
+
+READ_METHODS = ("GET", "HEAD")
+
+
+def replica_binds(uris):
+    return {f"replica_{index}": uri for index, uri in enumerate(uris)}
+
+
+class RoutingSession(SignallingSession):
+    """Session reading from the replica picked for the request, until it writes"""
+
+    pinned = False
+
+    def get_bind(self, mapper=None, clause=None):
+        replica = g.get("database_replica") if has_app_context() else None
+        if replica is not None and not self.pinned:
+            if not self._flushing and not getattr(clause, "is_dml", False):
+                return get_state(self.app).db.get_engine(self.app, bind=replica)
+            self.pinned = True
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+class ReplicaRouter:
+    """Pick the database of the requests of the blueprints passed to `init_blueprint`"""
+
+    def __init__(self):
+        self.replicas = ()
+        self.recent_writers = TTLCache(maxsize=10000, ttl=5)
+        self.recent_tags = TTLCache(maxsize=10000, ttl=5)
+        self.replica_requests = 0
+        self.sticky_requests = 0
+        self.refill_requests = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.replicas = tuple(replica_binds(app.config["DATABASE_REPLICA_URIS"]))
+        self.recent_writers.ttl = app.config["DATABASE_REPLICA_STICKINESS"]
+        self.recent_tags.ttl = app.config["DATABASE_REPLICA_STICKINESS"]
+
+    def init_blueprint(self, blueprint):
+        blueprint.before_request(self.route)
+        blueprint.after_request(self.record_write)
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def route(self):
+        if not self.replicas or request.method not in READ_METHODS:
+            return
+
+        verify_jwt_in_request(optional=True)
+        user_id = get_jwt_identity()
+        if user_id is not None and self.recent_writers.get(user_id):
+            self._count("sticky_requests")
+            return
+
+        self._count("replica_requests")
+        g.database_replica = random.choice(self.replicas)
+
+    def record_write(self, response):
+        if self.replicas and request.method not in READ_METHODS and response.status_code < 400:
+            user_id = get_jwt_identity()
+            if user_id is not None:
+                self.recent_writers.set(user_id, True)
+        return response
+
+    def record_invalidation(self, tags):
+        """Remember the response cache tags invalidated by a write, see `refill`"""
+        if self.replicas:
+            for tag in tags:
+                self.recent_tags.set(tag, True)
+
+    def refill(self, tags):
+        """Move the request to the primary if it refills cache entries invalidated recently"""
+        if g.get("database_replica") is not None and any(self.recent_tags.get(tag) for tag in tags):
+            self._count("refill_requests")
+            g.pop("database_replica", None)
+
+    def stats(self):
+        return {
+            "replicas": len(self.replicas),
+            "replica_requests": self.replica_requests,
+            "sticky_requests": self.sticky_requests,
+            "refill_requests": self.refill_requests,
+            "sticky_users": len(self.recent_writers),
+        }
@@ -0,0 +1,175 @@
+"""Response cache for the GET endpoints of the API
+
+Responses are cached per user, endpoint, view arguments and normalized query string,
+and stored under tags naming what they were built from (see `tag`). Writes invalidate
+the tags they touch, so only the entries of the affected project are evicted.
+
+The default backend lives in process: each gunicorn worker has its own copy and only
+sees the invalidations of the writes it served, so entries also expire after
+``RESPONSE_CACHE_TTL`` seconds. Set ``RESPONSE_CACHE_BACKEND`` to the import path of a
+`ResponseCacheBackend` built on a shared store to invalidate across workers.
+"""
+import functools
+import json
+import threading
+from collections import defaultdict
+
+from flask import request
+from flask_jwt_extended import current_user
+from flask_restful.utils import unpack
+from werkzeug.http import unquote_etag
+from werkzeug.utils import import_string
+
+from todo.commons.cache import TTLCache
+from todo.commons.conditional import is_not_modified, not_modified
+
+
+def tag(kind, id_):
+    return f"{kind}:{id_}"
+
+
+class ResponseCacheBackend:
+    """Storage of the cached responses, created with the size and TTL of the app config"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, tags):
+        """Store `value` until any of `tags` is invalidated"""
+        raise NotImplementedError
+
+    def invalidate(self, tags):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class MemoryBackend(ResponseCacheBackend):
+    """Per-worker LRU backend, indexing the keys stored under each tag"""
+
+    def __init__(self, maxsize, ttl):
+        super().__init__(maxsize, ttl)
+        self._entries = TTLCache(maxsize, ttl)
+        self._keys = defaultdict(set)
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def set(self, key, value, tags):
+        self._entries.set(key, value)
+        with self._lock:
+            for tag_ in tags:
+                self._keys[tag_].add(key)
+            self._writes += 1
+            if self._writes % self.maxsize == 0:
+                self._prune()
+
+    def _prune(self):
+        """Forget the keys the LRU evicted"""
+        for tag_ in list(self._keys):
+            self._keys[tag_] = {key for key in self._keys[tag_] if key in self._entries}
+            if not self._keys[tag_]:
+                del self._keys[tag_]
+
+    def invalidate(self, tags):
+        with self._lock:
+            keys = set().union(*(self._keys.pop(tag_, ()) for tag_ in tags))
+        for key in keys:
+            self._entries.pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+        self._entries.clear()
+
+
+class ResponseCache:
+    """Cache of the 200 responses of flask-restful GET methods, see `cached`"""
+
+    def __init__(self):
+        self.enabled = False
+        self.backend = None
+        self.replica_router = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app, replica_router=None):
+        """`replica_router` moves the refills of recently invalidated entries to the primary"""
+        self.replica_router = replica_router
+        self.enabled = app.config.get("RESPONSE_CACHE_ENABLED", True)
+        backend = app.config.get("RESPONSE_CACHE_BACKEND", "memory")
+        backend_class = MemoryBackend if backend == "memory" else import_string(backend)
+        self.backend = backend_class(app.config.get("RESPONSE_CACHE_SIZE", 4096), app.config.get("RESPONSE_CACHE_TTL", 10))
+
+    def _count(self, counter, n=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + n)
+
+    @staticmethod
+    def _key():
+        return json.dumps(
+            [
+                current_user.id,
+                request.endpoint,
+                sorted(request.view_args.items()),
+                sorted(request.args.items(multi=True)),
+            ],
+            separators=(",", ":"),
+        )
+
+    def cached(self, tags, allowed=None):
+        """Cache the responses of a GET method, run after its authentication
+
+        `tags(**view_args)` returns the tags whose invalidation evicts the response.
+        `allowed(**view_args)`, the access check of the method, runs again before serving a
+        hit: the user may have lost access through another worker since it was stored.
+        """
+
+        def decorator(f):
+            @functools.wraps(f)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return f(*args, **kwargs)
+
+                key = self._key()
+                entry = self.backend.get(key)
+                if entry is not None and (allowed is None or allowed(**kwargs)):
+                    self._count("hits")
+                    data, headers = entry
+                    etag = unquote_etag(headers["ETag"])[0] if "ETag" in headers else None
+                    if etag and is_not_modified(etag):
+                        return not_modified(etag)
+                    return data, 200, {**headers, "X-Cache": "HIT"}
+
+                self._count("misses")
+                entry_tags = tags(**kwargs)
+                if self.replica_router is not None:
+                    self.replica_router.refill(entry_tags)
+                data, code, headers = unpack(f(*args, **kwargs))
+                if code == 200:
+                    self.backend.set(key, (data, dict(headers)), entry_tags)
+                return data, code, {**headers, "X-Cache": "MISS"}
+
+            return wrapper
+
+        return decorator
+
+    def invalidate(self, *tags):
+        """Evict every response stored under any of `tags`, call it once the write is committed"""
+        if self.enabled and tags:
+            self._count("invalidations", len(tags))
+            self.backend.invalidate(tags)
+            if self.replica_router is not None:
+                self.replica_router.record_invalidation(tags)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "invalidations": self.invalidations}
@@ -0,0 +1,208 @@
+"""Fast serialization layer
+
+Two independent pieces:
+
+- a pluggable JSON backend, used by Flask (request parsing, ``jsonify``) and by the
+  flask-restful ``Api`` representation. ``orjson`` is used when installed, the standard
+  library otherwise. Set ``JSON_BACKEND`` to ``json`` to force the fallback.
+- `CompiledDumpMixin`, which compiles a marshmallow schema once into a single generated
+  function building the output dict, instead of running field by field.
+"""
+import json
+
+from flask import make_response
+from flask.json.provider import DefaultJSONProvider
+from marshmallow import fields
+from marshmallow.decorators import POST_DUMP, PRE_DUMP
+from marshmallow_enum import EnumField, LoadDumpOptions
+from marshmallow_sqlalchemy.fields import Related, RelatedList
+from sqlalchemy import inspect
+from sqlalchemy.orm import MANYTOONE, ColumnProperty
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class StdlibJSONBackend:
+    name = "json"
+
+    @staticmethod
+    def dumps(obj, default=None, indent=False, sort_keys=False):
+        separators = None if indent else (",", ":")
+        return json.dumps(obj, default=default, indent=2 if indent else None, separators=separators, sort_keys=sort_keys)
+
+    @staticmethod
+    def loads(s):
+        return json.loads(s)
+
+
+class OrjsonBackend:
+    name = "orjson"
+
+    @staticmethod
+    def dumps(obj, default=None, indent=False, sort_keys=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=default, option=option).decode()
+
+    @staticmethod
+    def loads(s):
+        return orjson.loads(s)
+
+
+JSON_BACKENDS = {StdlibJSONBackend.name: StdlibJSONBackend, OrjsonBackend.name: OrjsonBackend}
+
+json_backend = StdlibJSONBackend
+
+
+def set_json_backend(name="auto"):
+    """Select the JSON backend by name, ``auto`` picks the fastest one installed"""
+    global json_backend
+
+    if name == "auto":
+        name = OrjsonBackend.name if orjson is not None else StdlibJSONBackend.name
+    if name == OrjsonBackend.name and orjson is None:
+        raise RuntimeError("The orjson JSON backend is selected but orjson is not installed")
+
+    json_backend = JSON_BACKENDS[name]
+    return json_backend
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider delegating to the selected backend"""
+
+    def dumps(self, obj, **kwargs):
+        return json_backend.dumps(
+            obj,
+            default=kwargs.get("default", self.default),
+            indent=bool(kwargs.get("indent")),
+            sort_keys=kwargs.get("sort_keys", self.sort_keys),
+        )
+
+    def loads(self, s, **kwargs):
+        return json_backend.loads(s)
+
+
+def output_json(data, code, headers=None):
+    """flask-restful representation for ``application/json``"""
+    resp = make_response(json_backend.dumps(data, default=DefaultJSONProvider.default) + "\n", code)
+    resp.headers.extend(headers or {})
+    return resp
+
+
+def _many(dump, value):
+    return None if value is None else [dump(item) for item in value]
+
+
+def _one(dump, value):
+    return None if value is None else dump(value)
+
+
+def _related_key(field):
+    if len(field.related_keys) != 1:
+        return None
+    return field.related_keys[0].key
+
+
+def _foreign_key(field, key):
+    """Attribute of the local foreign key holding the value a many-to-one `Related` field dumps"""
+    prop = getattr(field.model, field.attribute or field.name).property
+    if prop.direction is not MANYTOONE or len(prop.local_remote_pairs) != 1:
+        return None
+
+    local, remote = prop.local_remote_pairs[0]
+    if prop.mapper.get_property_by_column(remote).key != key:
+        return None
+    return inspect(field.model).get_property_by_column(local).key
+
+
+# Fields dumping values of these types as they are
+_PASSTHROUGH_TYPES = {fields.Integer: int, fields.String: str, fields.Boolean: bool}
+
+
+def _column_type(model, attribute):
+    """Python type of the column mapped to `attribute` of `model`, or None if it is not a plain column"""
+    prop = inspect(model).attrs.get(attribute) if model is not None else None
+    if not isinstance(prop, ColumnProperty) or len(prop.columns) != 1:
+        return None
+    try:
+        return prop.columns[0].type.python_type
+    except NotImplementedError:
+        return None
+
+
+def _compile_field(name, field, namespace, model=None):
+    """Python expression dumping `field` from `obj`, and the helpers it needs in `namespace`"""
+    attribute = field.attribute or name
+    value = f"obj.{attribute}" if attribute.isidentifier() else f"getattr(obj, {attribute!r})"
+    helper = f"_f_{len(namespace)}"
+
+    # Skipping marshmallow's coercion is only safe when the column already holds the dumped type
+    passthrough = _PASSTHROUGH_TYPES.get(type(field))
+    if passthrough and not getattr(field, "as_string", False) and _column_type(model, attribute) is passthrough:
+        return value
+
+    if isinstance(field, EnumField):
+        member = "value" if field.dump_by == LoadDumpOptions.value else "name"
+        return f"(None if {value} is None else {value}.{member})"
+
+    if isinstance(field, Related) and (key := _related_key(field)):
+        # Read the foreign key rather than loading the related object, unless it is not flushed yet
+        if foreign_key := _foreign_key(field, key):
+            return f"(obj.{foreign_key} if obj.{foreign_key} is not None else getattr({value}, {key!r}, None))"
+        return f"getattr({value}, {key!r}, None)"
+
+    if isinstance(field, RelatedList) and isinstance(field.inner, Related) and (key := _related_key(field.inner)):
+        namespace[helper] = lambda item, key=key: getattr(item, key, None)
+        return f"_many({helper}, {value})"
+
+    if isinstance(field, fields.Nested):
+        nested = field.schema
+        if isinstance(nested, CompiledDumpMixin) and (dump := nested.compiled_dump()):
+            namespace[helper] = dump
+            return f"_{'many' if nested.many else 'one'}({helper}, {value})"
+
+    # Anything else goes through marshmallow itself
+    namespace[helper] = field
+    return f"{helper}.serialize({name!r}, obj)"
+
+
+def compile_schema(schema):
+    """Generate a function dumping one object like `schema.dump` would, or None if it can't"""
+    if schema._has_processors(PRE_DUMP) or schema._has_processors(POST_DUMP):
+        return None
+
+    namespace = {"_many": _many, "_one": _one}
+    model = getattr(schema.opts, "model", None)
+    items = [
+        f"        {(field.data_key or name)!r}: {_compile_field(name, field, namespace, model)},"
+        for name, field in schema.dump_fields.items()
+    ]
+    source = "\n".join(["def dump(obj):", "    return {", *items, "    }"])
+    exec(compile(source, f"<compiled {type(schema).__name__}>", "exec"), namespace)
+    return namespace["dump"]
+
+
+class CompiledDumpMixin:
+    """Replace `Schema.dump` by a function compiled once per schema class and options"""
+
+    _compiled_dumps = {}
+
+    def compiled_dump(self):
+        key = (type(self), self.only and frozenset(self.only), frozenset(self.exclude), self.ordered)
+        if key not in self._compiled_dumps:
+            self._compiled_dumps[key] = compile_schema(self)
+        return self._compiled_dumps[key]
+
+    def dump(self, obj, *, many=None):
+        dump = self.compiled_dump()
+        if dump is None:
+            return super().dump(obj, many=many)
+
+        many = self.many if many is None else bool(many)
+        return [dump(item) for item in obj] if many else dump(obj)
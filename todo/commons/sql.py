@@ -0,0 +1,216 @@
+"""Custom SQL constructs used by the query helpers
+"""
+import itertools
+import json
+import re
+import sys
+
+from sqlalchemy import and_, func, inspect, insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable, Join
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class Explain(Executable, ClauseElement):
+    """``EXPLAIN`` wrapper around a select, keeping its bound parameters
+
+    Supported on Postgres, where ``FORMAT JSON`` makes the plan easy to read back, and on
+    SQLite as ``EXPLAIN QUERY PLAN`` (without `analyze`).
+    """
+
+    inherit_cache = False
+
+    def __init__(self, statement, analyze=False):
+        self.statement = statement
+        self.analyze = analyze
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    options = "ANALYZE, FORMAT JSON" if element.analyze else "FORMAT JSON"
+    return "EXPLAIN (%s) %s" % (options, compiler.process(element.statement, **kw))
+
+
+@compiles(Explain, "sqlite")
+def _compile_explain_sqlite(element, compiler, **kw):
+    return "EXPLAIN QUERY PLAN %s" % compiler.process(element.statement, **kw)
+
+
+def _postgresql_full_scans(node):
+    if node["Node Type"] == "Seq Scan" or (
+        node["Node Type"] in ("Index Scan", "Index Only Scan") and "Index Cond" not in node
+    ):
+        yield node["Relation Name"]
+    for child in node.get("Plans", ()):
+        yield from _postgresql_full_scans(child)
+
+
+def full_scans(session, statement):
+    """Tables that `statement` reads in full, through a table scan or an index scan without condition
+
+    On Postgres, sequential scans are disabled for the transaction first: the planner then
+    only falls back to one when no index is usable, whatever the size of the tables.
+    """
+    dialect = session.connection().dialect.name
+
+    if dialect == "postgresql":
+        session.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = session.execute(Explain(statement)).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return sorted(set(_postgresql_full_scans(plan[0]["Plan"])))
+
+    if dialect == "sqlite":
+        details = [row[-1] for row in session.execute(Explain(statement))]
+        # Virtual tables are scanned through their own index when given a constraint, like MATCH
+        scans = (re.match(r"SCAN (\w+)\b(?! VIRTUAL TABLE INDEX \d+:\S)", detail) for detail in details)
+        return sorted({match[1] for match in scans if match} - {"CONSTANT"})
+
+    raise NotImplementedError(f"Query plans can't be read on {dialect}")
+
+
+class CrossJoin(Join):
+    """Inner join scanning its left side first: ``CROSS JOIN`` on SQLite, a plain join elsewhere
+
+    SQLite's planner never reorders the tables of a ``CROSS JOIN``, use it when it picks the
+    wrong outer table, like a B-tree index where a virtual table would be far more selective.
+    """
+
+    inherit_cache = True
+
+    def __init__(self, left, right, onclause):
+        super().__init__(left, right, onclause)
+
+
+@compiles(CrossJoin, "sqlite")
+def _compile_cross_join_sqlite(element, compiler, from_linter=None, **kw):
+    kw.pop("asfrom", None)
+    if from_linter:
+        from_linter.edges.update(itertools.product(element.left._from_objects, element.right._from_objects))
+    return "%s CROSS JOIN %s ON %s" % (
+        compiler.process(element.left, asfrom=True, from_linter=from_linter, **kw),
+        compiler.process(element.right, asfrom=True, from_linter=from_linter, **kw),
+        compiler.process(element.onclause, from_linter=from_linter, **kw),
+    )
+
+
+class bytewise(FunctionElement):
+    """String compared by code point, for ranges and orders an index can serve on any database
+
+    Postgres needs the ``C`` collation for it, both in the query and in the index. SQLite
+    compares strings bytewise already.
+    """
+
+    name = "bytewise"
+    inherit_cache = True
+
+    def __init__(self, expression):
+        super().__init__(expression)
+        self.type = expression.type
+
+
+@compiles(bytewise)
+def _compile_bytewise(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(bytewise, "postgresql")
+def _compile_bytewise_postgresql(element, compiler, **kw):
+    return '%s COLLATE "C"' % compiler.process(element.clauses, **kw)
+
+
+def prefix_range(expression, prefix):
+    """Criterion matching the values of `expression` starting with `prefix`, as an index range
+
+    Compare `bytewise` expressions, the range follows code point order.
+    """
+    stem = prefix.rstrip(chr(sys.maxunicode))
+    if not stem:
+        return expression >= prefix
+    return and_(expression >= prefix, expression < stem[:-1] + chr(ord(stem[-1]) + 1))
+
+
+class id_array(FunctionElement):
+    """Aggregate of IDs: an array on Postgres, a comma separated string elsewhere
+
+    Use `split_ids` to read the result back as a list.
+    """
+
+    name = "id_array"
+    inherit_cache = True
+
+
+@compiles(id_array)
+def _compile_id_array(element, compiler, **kw):
+    return "group_concat(%s)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(id_array, "postgresql")
+def _compile_id_array_postgresql(element, compiler, **kw):
+    return "array_agg(%s)" % compiler.process(element.clauses, **kw)
+
+
+def split_ids(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [int(v) for v in value.split(",")]
+    return list(value)
+
+
+def insert_many(session, model, rows):
+    """Insert `rows` of `model` in batch, and return their generated primary keys in order
+
+    On Postgres the keys are reserved from the table's sequence with one query, then the
+    rows go out as a single batched INSERT. Other databases get them from the ORM flush.
+    """
+    if not rows:
+        return []
+
+    mapper = inspect(model)
+    column = mapper.primary_key[0]
+    dialect = session.connection(mapper=mapper).dialect
+
+    if dialect.name != "postgresql":
+        instances = [model(**row) for row in rows]
+        session.add_all(instances)
+        session.flush(instances)
+        return [getattr(instance, mapper.get_property_by_column(column).key) for instance in instances]
+
+    sequence = func.pg_get_serial_sequence(dialect.identifier_preparer.format_table(mapper.local_table), column.name)
+    ids = session.execute(select(func.nextval(sequence)).select_from(func.generate_series(1, len(rows)))).scalars().all()
+    session.execute(insert(mapper.local_table), [{**row, column.key: id_} for row, id_ in zip(rows, ids)])
+    return ids
+
+
+def upsert(session, table, rows, keys):
+    """Insert `rows` in one statement, updating the other columns of rows whose `keys` already exist
+
+    Uses ``INSERT ... ON CONFLICT DO UPDATE``, on Postgres and SQLite.
+    """
+    if not rows:
+        return
+
+    dialect = {"postgresql": postgresql, "sqlite": sqlite}[session.connection().dialect.name]
+    statement = dialect.insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=keys,
+        set_={column: statement.excluded[column] for column in rows[0] if column not in keys},
+    )
+    session.execute(statement, rows)
+
+
+def with_tables(*tables):
+    """`DDL.execute_if` condition of a metadata event, true when it creates or drops all of `tables`
+
+    The metadata events also fire for the binds without these tables, such as the read
+    replicas, and when ``create_all`` finds them already created.
+    """
+
+    required = tables
+
+    def condition(ddl, target, bind, tables=None, **kw):
+        return tables is not None and all(table in tables for table in required)
+
+    return condition
@@ -10,3 +10,45 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 
 SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URI")
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Connection pool, see todo.commons.database. "queue", or "pgbouncer" behind PgBouncer's transaction pooling
+DATABASE_POOL_MODE = os.getenv("DATABASE_POOL_MODE", "queue")
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
+DATABASE_POOL_TIMEOUT = int(os.getenv("DATABASE_POOL_TIMEOUT", "30"))
+DATABASE_POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE", "1800"))
+DATABASE_POOL_PRE_PING = os.getenv("DATABASE_POOL_PRE_PING", "true").lower() == "true"
+# In milliseconds, 0 disables it
+DATABASE_STATEMENT_TIMEOUT = int(os.getenv("DATABASE_STATEMENT_TIMEOUT", "0"))
+
+# Comma separated URIs of the read replicas serving the API's GET requests, see todo.commons.replicas.
+# Users read from the primary for DATABASE_REPLICA_STICKINESS seconds after their writes, and so do
+# the requests refilling the response cache entries invalidated by these writes.
+DATABASE_REPLICA_URIS = [uri.strip() for uri in os.getenv("DATABASE_REPLICA_URIS", "").split(",") if uri.strip()]
+DATABASE_REPLICA_STICKINESS = int(os.getenv("DATABASE_REPLICA_STICKINESS", "5"))
+
+# "auto" uses orjson when it is installed, "json" forces the standard library
+JSON_BACKEND = os.getenv("JSON_BACKEND", "auto")
+
+# Embed a project ID -> role map in access tokens, and trust it instead of querying memberships.
+# Users with more than JWT_PROJECT_CLAIMS_LIMIT projects get tokens without the map.
+JWT_PROJECT_CLAIMS = os.getenv("JWT_PROJECT_CLAIMS", "false").lower() == "true"
+JWT_PROJECT_CLAIMS_LIMIT = int(os.getenv("JWT_PROJECT_CLAIMS_LIMIT", "100"))
+
+PAGINATION_COUNT_CACHE_TTL = int(os.getenv("PAGINATION_COUNT_CACHE_TTL", "30"))
+
+# Per-worker cache of authenticated users, invalidated on writes to the user row
+IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "10000"))
+IDENTITY_CACHE_TTL = int(os.getenv("IDENTITY_CACHE_TTL", "60"))
+
+# Cache of the API's GET responses, "memory" is per worker, or the import path of a
+# `todo.commons.response_cache.ResponseCacheBackend` subclass. Writes only evict the
+# entries of the worker that handled them: with several workers and the "memory"
+# backend, lists may be stale for up to RESPONSE_CACHE_TTL seconds, hence off by default.
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "4096"))
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "10"))
+
+# Maximum number of items accepted by the bulk endpoints
+BULK_LIMIT = int(os.getenv("BULK_LIMIT", "1000"))
@@ -3,18 +3,26 @@
 All extensions here are used as singletons and
 initialized in application factory
 """
-from flask_sqlalchemy import SQLAlchemy
 from passlib.context import CryptContext
 from flask_jwt_extended import JWTManager
 from flask_marshmallow import Marshmallow
 from flask_migrate import Migrate
 
 from todo.commons.apispec import APISpecExt
+from todo.commons.cache import TTLCache
+from todo.commons.database import PoolMetrics
+from todo.commons.replicas import ReplicaRouter, RoutingSQLAlchemy
+from todo.commons.response_cache import ResponseCache
 
 
-db = SQLAlchemy()
+db = RoutingSQLAlchemy()
 jwt = JWTManager()
 ma = Marshmallow()
 migrate = Migrate()
 apispec = APISpecExt()
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+count_cache = TTLCache(maxsize=4096, ttl=30)
+identity_cache = TTLCache(maxsize=10000, ttl=60)
+response_cache = ResponseCache()
+pool_metrics = PoolMetrics()
+replica_router = ReplicaRouter()
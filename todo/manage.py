@@ -1,6 +1,20 @@
+import time
+import tracemalloc
+
 import click
 from flask.cli import with_appcontext
 
+# Leaf tables of the task tables, themselves when not partitioned, see migration a7c3e5f1d208
+TASK_TABLES_QUERY = """
+    SELECT tree.parent, stats.relname, pg_total_relation_size(stats.relid), stats.n_live_tup, stats.n_dead_tup
+    FROM (
+        SELECT 'task' AS parent, relid FROM pg_partition_tree('task') WHERE isleaf
+        UNION ALL SELECT 'task_assignment', relid FROM pg_partition_tree('task_assignment') WHERE isleaf
+    ) AS tree
+    JOIN pg_stat_user_tables AS stats ON stats.relid = tree.relid
+    ORDER BY tree.parent, stats.relname
+"""
+
 
 @click.command("init")
 @with_appcontext
@@ -13,3 +27,210 @@ def init():
     db.session.add(user)
     db.session.commit()
     click.echo("Created user 'admin'")
+
+
+@click.command("check-plans")
+@click.option("--project-id", type=int, help="Project to build the queries for, the first one by default")
+@click.option("--user-id", type=int, help="Member of the project to build the queries for")
+@with_appcontext
+def check_plans(project_id, user_id):
+    """Fail if a hot query of the API reads a whole table, run it against a seeded database"""
+    from todo.api.plans import hot_statements
+    from todo.commons.sql import full_scans
+    from todo.extensions import db
+    from todo.models import ProjectMembership, Task
+
+    membership = ProjectMembership.query.filter_by(
+        **{key: value for key, value in (("project_id", project_id), ("user_id", user_id)) if value is not None}
+    ).first()
+    task = membership and Task.query.filter_by(project_id=membership.project_id).first()
+    if task is None:
+        raise click.ClickException("No project with a member and a task found, seed the database first")
+
+    failed = False
+    for name, statement in hot_statements(membership.project_id, membership.user_id, task.id).items():
+        tables = full_scans(db.session, statement)
+        db.session.rollback()
+        failed = failed or bool(tables)
+        click.echo(f"{name}: {'full scan of ' + ', '.join(tables) if tables else 'ok'}")
+
+    if failed:
+        raise click.ClickException("Some queries can't use an index")
+
+
+@click.command("reconcile-counters")
+@click.option("--dry-run", is_flag=True, help="Only report the counters that drifted")
+@with_appcontext
+def reconcile_counters(dry_run):
+    """Recount the tasks of every project and assignee, and repair the counters that drifted"""
+    from todo.extensions import db
+    from todo.models.task_count import reconcile_task_counts
+
+    task_counts, assigned_counts = reconcile_task_counts(db.session, dry_run=dry_run)
+    for project_id, counted, actual in task_counts:
+        click.echo(f"project {project_id}: task counter at {actual} instead of {counted}")
+    for project_id, user_id, counted, actual in assigned_counts:
+        click.echo(f"project {project_id}, user {user_id}: assigned task counter at {actual} instead of {counted}")
+
+    if dry_run:
+        db.session.rollback()
+    else:
+        db.session.commit()
+    click.echo(f"{len(task_counts) + len(assigned_counts)} counters {'drifted' if dry_run else 'repaired'}")
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+@click.command("benchmark-tasks")
+@click.option("--projects", default=10, help="Number of projects to time, the largest ones")
+@click.option("--repeat", default=5, help="Runs of each query per project")
+@click.option("--vacuum", is_flag=True, help="Also time a VACUUM ANALYZE of each task table (Postgres)")
+@with_appcontext
+def benchmark_tasks(projects, repeat, vacuum):
+    """Time the task queries of the largest projects, to compare table layouts
+
+    Run it against the same data before and after partitioning the task tables.
+    """
+    from sqlalchemy import text
+
+    from todo.api.plans import hot_statements
+    from todo.extensions import db
+    from todo.models import Project, ProjectMembership, Task
+
+    samples = []
+    for (project_id,) in db.session.query(Project.id).order_by(Project.task_count.desc()).limit(projects):
+        membership = ProjectMembership.query.filter_by(project_id=project_id).first()
+        task = Task.query.filter_by(project_id=project_id).first()
+        if membership is not None and task is not None:
+            samples.append((project_id, membership.user_id, task.id))
+    if not samples:
+        raise click.ClickException("No project with a member and a task found, seed the database first")
+
+    timings = {}
+    for project_id, user_id, task_id in samples:
+        for name, statement in hot_statements(project_id, user_id, task_id).items():
+            if "task" not in name:
+                continue
+            for _ in range(repeat):
+                start = time.perf_counter()
+                db.session.execute(statement).fetchall()
+                timings.setdefault(name, []).append(1000 * (time.perf_counter() - start))
+        db.session.rollback()
+
+    click.echo(f"{len(samples)} projects, {repeat} runs each, in ms")
+    for name, values in timings.items():
+        click.echo(
+            f"{name}: p50 {_percentile(values, 0.5):.2f}, p95 {_percentile(values, 0.95):.2f}, max {max(values):.2f}"
+        )
+
+    if db.engine.dialect.name != "postgresql":
+        return
+
+    tables = {}
+    for parent, name, size, live, dead in db.session.execute(text(TASK_TABLES_QUERY)):
+        tables.setdefault(parent, []).append((name, size, live, dead))
+    db.session.rollback()
+
+    for parent, leaves in tables.items():
+        largest = max(leaves, key=lambda leaf: leaf[1])
+        click.echo(
+            f"{parent}: {len(leaves)} tables, {sum(leaf[1] for leaf in leaves) / 2**20:.1f} MB, "
+            f"{sum(leaf[2] for leaf in leaves)} live rows, {sum(leaf[3] for leaf in leaves)} dead rows, "
+            f"largest {largest[0]} at {largest[1] / 2**20:.1f} MB"
+        )
+
+    if not vacuum:
+        return
+
+    # VACUUM can't run in a transaction. Each table is vacuumed on its own, like autovacuum does
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for parent, leaves in tables.items():
+            durations = {}
+            for name, *_ in leaves:
+                start = time.perf_counter()
+                connection.execute(text(f"VACUUM (ANALYZE) {name}"))
+                durations[name] = 1000 * (time.perf_counter() - start)
+            slowest = max(durations, key=durations.get)
+            click.echo(
+                f"vacuum {parent}: {sum(durations.values()):.0f} ms in total, "
+                f"{durations[slowest]:.0f} ms at most ({slowest})"
+            )
+
+
+def _measure(dump, repeat):
+    """Latencies of `repeat` calls of `dump` in ms, and the peak memory of one call in KB"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        dump()
+        durations.append(1000 * (time.perf_counter() - start))
+
+    tracemalloc.start()
+    try:
+        dump()
+        peak = tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+    return durations, peak
+
+
+@click.command("benchmark-lists")
+@click.option("--projects", default=10, help="Number of projects to time, the largest ones")
+@click.option("--repeat", default=5, help="Runs of each list per project")
+@with_appcontext
+def benchmark_lists(projects, repeat):
+    """Compare the list endpoints' readers with ORM objects dumped by their schemas
+
+    Each list is read and dumped in full, the way a page of the endpoint would be.
+    """
+    from todo.api.readers import ProjectReader, TaskReader
+    from todo.api.resources.project import _member_of
+    from todo.api.schemas import ProjectSchema, TaskSchema
+    from todo.commons.loading import eager_load
+    from todo.extensions import db
+    from todo.models import Project, ProjectMembership, Task
+
+    samples = []
+    for (project_id,) in db.session.query(Project.id).order_by(Project.task_count.desc()).limit(projects):
+        membership = ProjectMembership.query.filter_by(project_id=project_id).first()
+        if membership is not None:
+            samples.append((project_id, membership.user_id))
+    if not samples:
+        raise click.ClickException("No project with a member found, seed the database first")
+
+    def with_schema(query, schema):
+        def dump():
+            schema.dump(eager_load(query, schema).all())
+            db.session.expunge_all()
+
+        return dump
+
+    def with_reader(query, reader):
+        return lambda: reader.dump(query.all())
+
+    timings = {}
+    for project_id, user_id in samples:
+        task_reader, project_reader = TaskReader(project_id=project_id), ProjectReader()
+        paths = {
+            "task list, orm": with_schema(Task.query.filter(Task.project_id == project_id), TaskSchema(many=True)),
+            "task list, reader": with_reader(task_reader.query(Task.project_id == project_id), task_reader),
+            "project list, orm": with_schema(Project.query.filter(_member_of(user_id)), ProjectSchema(many=True)),
+            "project list, reader": with_reader(project_reader.query(_member_of(user_id)), project_reader),
+        }
+        for name, dump in paths.items():
+            durations, peak = _measure(dump, repeat)
+            timing = timings.setdefault(name, {"durations": [], "peaks": []})
+            timing["durations"].extend(durations)
+            timing["peaks"].append(peak)
+        db.session.rollback()
+
+    click.echo(f"{len(samples)} projects, {repeat} runs each, in ms and KB")
+    for name, timing in timings.items():
+        values = timing["durations"]
+        click.echo(
+            f"{name}: p50 {_percentile(values, 0.5):.2f}, p95 {_percentile(values, 0.95):.2f}, "
+            f"max {max(values):.2f}, peak memory {max(timing['peaks']):.0f}"
+        )
@@ -3,6 +3,8 @@ from todo.models.project import Project
 from todo.models.task import Task
 from todo.models.project_membership import ProjectMembership
 from todo.models.task_assignment import task_assignment
+from todo.models.task_count import AssignedTaskCount
+from todo.models.task_search import search_tasks
 
 
-__all__ = ["User", "Project", "Task", "ProjectMembership"]
+__all__ = ["User", "Project", "Task", "ProjectMembership", "AssignedTaskCount"]
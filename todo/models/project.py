@@ -4,9 +4,17 @@ from todo.extensions import db
 class Project(db.Model):
     id = db.Column(db.BigInteger, primary_key=True)
     name = db.Column(db.String(80), nullable=False)
+    version = db.Column(db.BigInteger, nullable=False, default=0, server_default="0")
+    # Maintained by triggers, see todo.models.task_count
+    task_count = db.Column(db.BigInteger, nullable=False, default=0, server_default="0")
 
     tasks = db.relationship("Task", back_populates="project")
     memberships = db.relationship("ProjectMembership", back_populates="project")
 
+    @classmethod
+    def bump_version(cls, *project_ids: int) -> None:
+        """Mark the tasks and memberships of these projects as changed, see `todo.commons.conditional`"""
+        cls.query.filter(cls.id.in_(project_ids)).update({cls.version: cls.version + 1}, synchronize_session=False)
+
     def __repr__(self):
         return "<Project %s>" % self.name
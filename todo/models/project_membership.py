@@ -9,7 +9,7 @@ class ProjectMembership(db.Model):
         MANAGER = enum.auto()
 
     user_id = db.Column(db.ForeignKey("user.id"), primary_key=True)
-    project_id = db.Column(db.ForeignKey("project.id"), primary_key=True)
+    project_id = db.Column(db.ForeignKey("project.id"), primary_key=True, index=True)
     role = db.Column(db.Enum(Role), nullable=False)
 
     project = db.relationship("Project", back_populates="memberships")
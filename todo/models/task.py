@@ -1,3 +1,4 @@
+from todo.commons.sql import bytewise
 from todo.extensions import db
 
 
@@ -10,5 +11,13 @@ class Task(db.Model):
     project = db.relationship("Project", back_populates="tasks")
     assignees = db.relationship("User", secondary="task_assignment")
 
+    # The orderings of the task lists, see TASK_LISTING in todo.api.resources.task
+    __table_args__ = (
+        db.Index("ix_task_project_id_id", project_id, id),
+        db.Index("ix_task_project_id_title", project_id, bytewise(title), id),
+        # Referenced by `task_assignment`, which carries the project of its task
+        db.UniqueConstraint(id, project_id, name="uq_task_id_project_id"),
+    )
+
     def __repr__(self):
         return "<Task %s>" % self.title
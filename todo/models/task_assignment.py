@@ -5,5 +5,10 @@ task_assignment = db.Table(
     "task_assignment",
     db.Model.metadata,
     db.Column("user_id", db.ForeignKey("user.id"), primary_key=True),
-    db.Column("task_id", db.ForeignKey("task.id"), primary_key=True),
+    db.Column("task_id", db.BigInteger, primary_key=True, index=True),
+    # Copied from the task, so that the table can be partitioned by project like `task`
+    db.Column("project_id", db.BigInteger, nullable=False),
+    db.ForeignKeyConstraint(
+        ["task_id", "project_id"], ["task.id", "task.project_id"], name="task_assignment_task_id_project_id_fkey"
+    ),
 )
@@ -0,0 +1,154 @@
+"""Denormalized task counters
+
+`Project.task_count` counts the tasks of each project, and `AssignedTaskCount` the tasks
+of each project assigned to each user. Both are maintained by database triggers, in the
+transaction of the write, so that the bulk statements of the API are counted as well as
+the ORM flushes. On Postgres the triggers run once per statement, on SQLite once per row.
+
+`reconcile_task_counts` repairs them if they drift, see ``flask reconcile-counters``.
+"""
+from sqlalchemy import DDL, bindparam, event, func, select, text, update
+
+from todo.commons.sql import upsert, with_tables
+from todo.extensions import db
+from todo.models.project import Project
+from todo.models.task import Task
+from todo.models.task_assignment import task_assignment
+
+
+class AssignedTaskCount(db.Model):
+    project_id = db.Column(db.ForeignKey("project.id"), primary_key=True)
+    user_id = db.Column(db.ForeignKey("user.id"), primary_key=True)
+    task_count = db.Column(db.BigInteger, nullable=False, default=0, server_default="0")
+
+
+POSTGRESQL_TRIGGERS = [
+    """
+    CREATE FUNCTION count_tasks() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        UPDATE project SET task_count = project.task_count + delta.task_count
+        FROM (
+            SELECT project_id, count(*) * (CASE TG_OP WHEN 'INSERT' THEN 1 ELSE -1 END) AS task_count
+            FROM changed GROUP BY project_id
+        ) AS delta
+        WHERE project.id = delta.project_id;
+        RETURN NULL;
+    END $$
+    """,
+    """
+    CREATE FUNCTION count_assigned_tasks() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO assigned_task_count AS counter (project_id, user_id, task_count)
+        SELECT project_id, user_id, count(*) * (CASE TG_OP WHEN 'INSERT' THEN 1 ELSE -1 END)
+        FROM changed GROUP BY project_id, user_id ORDER BY project_id, user_id
+        ON CONFLICT (project_id, user_id) DO UPDATE SET task_count = counter.task_count + EXCLUDED.task_count;
+        RETURN NULL;
+    END $$
+    """,
+    "CREATE TRIGGER count_inserted_tasks AFTER INSERT ON task "
+    "REFERENCING NEW TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION count_tasks()",
+    "CREATE TRIGGER count_deleted_tasks AFTER DELETE ON task "
+    "REFERENCING OLD TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION count_tasks()",
+    "CREATE TRIGGER count_inserted_assignments AFTER INSERT ON task_assignment "
+    "REFERENCING NEW TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION count_assigned_tasks()",
+    "CREATE TRIGGER count_deleted_assignments AFTER DELETE ON task_assignment "
+    "REFERENCING OLD TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION count_assigned_tasks()",
+]
+
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER count_inserted_tasks AFTER INSERT ON task BEGIN
+        UPDATE project SET task_count = task_count + 1 WHERE id = NEW.project_id;
+    END
+    """,
+    """
+    CREATE TRIGGER count_deleted_tasks AFTER DELETE ON task BEGIN
+        UPDATE project SET task_count = task_count - 1 WHERE id = OLD.project_id;
+    END
+    """,
+    """
+    CREATE TRIGGER count_inserted_assignments AFTER INSERT ON task_assignment BEGIN
+        INSERT INTO assigned_task_count (project_id, user_id, task_count)
+        VALUES (NEW.project_id, NEW.user_id, 1)
+        ON CONFLICT (project_id, user_id) DO UPDATE SET task_count = task_count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER count_deleted_assignments AFTER DELETE ON task_assignment BEGIN
+        UPDATE assigned_task_count SET task_count = task_count - 1
+        WHERE user_id = OLD.user_id AND project_id = OLD.project_id;
+    END
+    """,
+]
+
+COUNTED_TABLES = with_tables(Project.__table__, Task.__table__, task_assignment, AssignedTaskCount.__table__)
+
+for dialect, statements in (("postgresql", POSTGRESQL_TRIGGERS), ("sqlite", SQLITE_TRIGGERS)):
+    for statement in statements:
+        event.listen(
+            db.Model.metadata, "after_create", DDL(statement).execute_if(dialect=dialect, callable_=COUNTED_TABLES)
+        )
+event.listen(
+    db.Model.metadata,
+    "after_drop",
+    DDL("DROP FUNCTION IF EXISTS count_tasks(), count_assigned_tasks()").execute_if(
+        dialect="postgresql", callable_=COUNTED_TABLES
+    ),
+)
+
+
+def reconcile_task_counts(session, dry_run=False):
+    """Recount the tasks of every project and assignee, and fix the counters that drifted
+
+    Returns the ``(project_id, counted, actual)`` and ``(project_id, user_id, counted, actual)``
+    tuples of the drifted counters. On Postgres, task writes wait until the transaction ends.
+    """
+    if session.connection(mapper=Task.__mapper__).dialect.name == "postgresql":
+        session.execute(text("LOCK TABLE task, task_assignment IN SHARE MODE"))
+
+    task_counts = (
+        session.query(Project.id, func.count(Task.id), Project.task_count)
+        .outerjoin(Task, Task.project_id == Project.id)
+        .group_by(Project.id, Project.task_count)
+        .having(func.count(Task.id) != Project.task_count)
+        .all()
+    )
+
+    counted = {
+        (project_id, user_id): count
+        for project_id, user_id, count in session.execute(
+            select(task_assignment.c.project_id, task_assignment.c.user_id, func.count()).group_by(
+                task_assignment.c.project_id, task_assignment.c.user_id
+            )
+        )
+    }
+    actual = {
+        (project_id, user_id): count
+        for project_id, user_id, count in session.query(
+            AssignedTaskCount.project_id, AssignedTaskCount.user_id, AssignedTaskCount.task_count
+        )
+    }
+    assigned_counts = [
+        (*key, counted.get(key, 0), actual.get(key, 0))
+        for key in sorted(counted.keys() | actual.keys())
+        if counted.get(key, 0) != actual.get(key, 0)
+    ]
+
+    if not dry_run:
+        if task_counts:
+            session.execute(
+                update(Project.__table__)
+                .where(Project.__table__.c.id == bindparam("b_id"))
+                .values(task_count=bindparam("b_task_count")),
+                [{"b_id": project_id, "b_task_count": count} for project_id, count, _ in task_counts],
+            )
+        upsert(
+            session,
+            AssignedTaskCount.__table__,
+            [
+                {"project_id": project_id, "user_id": user_id, "task_count": count}
+                for project_id, user_id, count, _ in assigned_counts
+            ],
+            ["project_id", "user_id"],
+        )
+    return task_counts, assigned_counts
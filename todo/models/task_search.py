@@ -0,0 +1,98 @@
+"""Full-text search over the title and description of tasks
+
+On Postgres, ``task.search_vector`` is a ``tsvector`` generated from both columns, the
+title weighing more, and searched through a GIN index. On SQLite, the ``task_search``
+FTS5 table indexes the task rows, kept in sync by triggers. Neither is mapped on `Task`,
+so that task queries don't load them; `search_tasks` builds the search for the dialect.
+"""
+import re
+
+from sqlalchemy import DDL, Float, cast, event, false, func, literal_column, table, column
+
+from todo.commons.sql import CrossJoin, with_tables
+from todo.extensions import db
+from todo.models.task import Task
+
+TEXT_SEARCH_CONFIG = "english"
+
+POSTGRESQL_SEARCH = [
+    """
+    ALTER TABLE task ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX ix_task_search_vector ON task USING gin (search_vector)",
+]
+
+SQLITE_SEARCH = [
+    "CREATE VIRTUAL TABLE task_search USING fts5("
+    "title, description, content='task', content_rowid='id', tokenize='porter unicode61')",
+    """
+    CREATE TRIGGER index_inserted_task AFTER INSERT ON task BEGIN
+        INSERT INTO task_search (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+    END
+    """,
+    """
+    CREATE TRIGGER index_deleted_task AFTER DELETE ON task BEGIN
+        INSERT INTO task_search (task_search, rowid, title, description)
+        VALUES ('delete', OLD.id, OLD.title, OLD.description);
+    END
+    """,
+    """
+    CREATE TRIGGER index_updated_task AFTER UPDATE OF title, description ON task BEGIN
+        INSERT INTO task_search (task_search, rowid, title, description)
+        VALUES ('delete', OLD.id, OLD.title, OLD.description);
+        INSERT INTO task_search (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+    END
+    """,
+]
+
+for statement in POSTGRESQL_SEARCH:
+    event.listen(Task.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for statement in SQLITE_SEARCH:
+    event.listen(
+        db.Model.metadata,
+        "after_create",
+        DDL(statement).execute_if(dialect="sqlite", callable_=with_tables(Task.__table__)),
+    )
+event.listen(
+    db.Model.metadata,
+    "after_drop",
+    DDL("DROP TABLE IF EXISTS task_search").execute_if(dialect="sqlite", callable_=with_tables(Task.__table__)),
+)
+
+search_vector = literal_column("task.search_vector")
+task_search = table("task_search", column("rowid"))
+
+
+def _fts5_query(terms):
+    """FTS5 query matching every word of `terms`, which may contain FTS5 operators"""
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", terms))
+
+
+def search_tasks(query, terms):
+    """Restrict a query of tasks to the ones matching `terms`, and add their ``rank`` column
+
+    The higher the rank, the better the match. Returns the query and the rank expression.
+    """
+    dialect = query.session.connection(mapper=Task.__mapper__).dialect.name
+
+    if dialect == "postgresql":
+        tsquery = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, terms)
+        # Double precision, so that the rank stored in cursors compares equal to itself
+        rank = cast(func.ts_rank(search_vector, tsquery), Float)
+        query = query.filter(search_vector.op("@@")(tsquery))
+    elif dialect == "sqlite":
+        # Same relative weights as the title and description in ts_rank
+        rank = -func.bm25(literal_column("task_search"), 1.0, 0.4, type_=Float)
+        match = _fts5_query(terms)
+        # Start from the full-text matches, SQLite would otherwise probe the index for every task
+        query = query.enable_assertions(False).select_from(
+            CrossJoin(task_search, Task.__table__, task_search.c.rowid == Task.id)
+        )
+        query = query.filter(literal_column("task_search").op("MATCH")(match) if match else false())
+    else:
+        raise NotImplementedError(f"Tasks can't be searched on {dialect}")
+
+    return query.add_columns(rank.label("rank")), rank
@@ -1,12 +1,12 @@
 import typing
 from typing import Any
 
+from flask import g
+from sqlalchemy import event
 from sqlalchemy.ext.hybrid import hybrid_property
 
-from todo.extensions import db, pwd_context
-
-if typing.TYPE_CHECKING:
-    from todo.models import Project, ProjectMembershipList
+from todo.extensions import db, identity_cache, pwd_context
+from todo.models.project_membership import ProjectMembership
 
 
 class User(db.Model):
@@ -14,6 +14,7 @@ class User(db.Model):
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(80), unique=True, nullable=False)
     _password = db.Column("password", db.String(255), nullable=False)
+    membership_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     memberships = db.relationship("ProjectMembership", back_populates="user")
 
@@ -25,11 +26,28 @@ class User(db.Model):
     def password(self, value):
         self._password = pwd_context.hash(value)
 
-    def get_membership_for_project(self, project: 'Project') -> typing.Optional['ProjectMembershipList']:
-        memberships = [m for m in project.memberships if m.user_id == self.id]
-        if not memberships:
-            return None
-        return memberships[0]
+    def get_membership_for_project(self, project_id: int) -> typing.Optional[ProjectMembership]:
+        """Primary key lookup of the membership, memoized for the rest of the request"""
+        memberships = g.setdefault("project_memberships", {})
+        key = (self.id, project_id)
+        if key not in memberships:
+            memberships[key] = ProjectMembership.query.get(key)
+        return memberships[key]
+
+    @classmethod
+    def bump_membership_version(cls, *user_ids: int) -> None:
+        """Invalidate the project claims of access tokens issued to these users"""
+        cls.query.filter(cls.id.in_(user_ids)).update(
+            {cls.membership_version: cls.membership_version + 1}, synchronize_session=False
+        )
+        for user_id in user_ids:
+            identity_cache.pop(user_id)
 
     def __repr__(self):
         return "<User %s>" % self.username
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _forget_identity(mapper, connection, target):
+    identity_cache.pop(target.id)